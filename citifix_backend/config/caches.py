@@ -0,0 +1,36 @@
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+ATOMIC_INCR_BACKENDS = (RedisCache, BaseMemcachedCache)
+
+
+def is_shared_cache(alias='default'):
+    """False when other worker processes never see what this one writes to the cache."""
+    return not isinstance(caches[alias], PROCESS_LOCAL_BACKENDS)
+
+
+def has_atomic_incr(alias='default'):
+    """True when incr() is a single operation on the cache server, so concurrent callers never get the same value."""
+    return isinstance(caches[alias], ATOMIC_INCR_BACKENDS)
+
+
+def shared_cache_check(app_configs, **kwargs):
+    if is_shared_cache():
+        if has_atomic_incr():
+            return []
+        return [checks.Warning(
+            'The default cache has no atomic increment, so websocket event replay is disabled.',
+            hint='Set CACHE_BACKEND to "redis".',
+            id='config.W002',
+        )]
+    return [checks.Warning(
+        'The default cache is local to each process, so the authentication user cache, '
+        'the shared report list cache and websocket event replay are disabled.',
+        hint='Set CACHE_BACKEND to "database" or "redis".',
+        id='config.W001',
+    )]
@@ -0,0 +1,190 @@
+import base64
+import json
+from collections import OrderedDict
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on a (timestamp, id) pair, newest first.
+
+    Pages are fetched with ``WHERE (ts, id) < cursor ORDER BY ts DESC, id DESC``
+    so no COUNT(*) or OFFSET scan is needed. ``?newer_than=<cursor>`` returns
+    rows added after a cursor in ascending order, which lets polling clients
+    catch up without gaps.
+    """
+    ordering_fields = ('created_at', 'id')
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    newer_query_param = 'newer_than'
+    invalid_cursor_message = 'Invalid cursor'
+
+    @classmethod
+    def is_requested(cls, request):
+        params = request.query_params
+        return (
+            params.get('pagination') == 'cursor'
+            or cls.cursor_query_param in params
+            or cls.newer_query_param in params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.newer_mode = self.newer_query_param in request.query_params
+
+        results = list(self.page_rows(queryset, request))
+        self.has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if self.newer_mode and not self.page:
+            self.newest_position = self.decode_cursor(request.query_params[self.newer_query_param])
+        elif self.page:
+            self.newest_position = self.position(self.page[-1] if self.newer_mode else self.page[0])
+        else:
+            self.newest_position = None
+
+        return self.page
+
+    def page_rows(self, queryset, request):
+        """The rows of the requested page plus the one after it, as a sliced queryset."""
+        if self.newer_query_param in request.query_params:
+            position = self.decode_cursor(request.query_params[self.newer_query_param])
+            queryset = self._filter(queryset, self.after(position)).order_by(*self.ordering_fields)
+        else:
+            queryset = queryset.order_by(*('-' + field for field in self.ordering_fields))
+            cursor = request.query_params.get(self.cursor_query_param)
+            if cursor:
+                queryset = self._filter(queryset, self.before(self.decode_cursor(cursor)))
+        return queryset[:self.get_page_size(request) + 1]
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('newer', self.get_newer_link()),
+            ('results', data),
+        ]))
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.has_more:
+            return None
+
+        url = self.request.build_absolute_uri()
+        if self.newer_mode:
+            return replace_query_param(url, self.newer_query_param, self.encode_cursor(self.newest_position))
+
+        url = remove_query_param(url, self.newer_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.position(self.page[-1])))
+
+    def get_newer_link(self):
+        if self.newest_position is None:
+            return None
+
+        url = remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return replace_query_param(url, self.newer_query_param, self.encode_cursor(self.newest_position))
+
+    def position(self, instance):
+        return [getattr(instance, field) for field in self.ordering_fields]
+
+    def before(self, position):
+        return self._compare(position, 'lt')
+
+    def after(self, position):
+        return self._compare(position, 'gt')
+
+    def _filter(self, queryset, query):
+        # The id part of a cursor is only validated once Django converts it
+        try:
+            return queryset.filter(query)
+        except (ValidationError, ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _compare(self, position, lookup):
+        # (a, b) < (x, y)  <=>  a < x OR (a = x AND b < y)
+        query = Q()
+        equal = {}
+        for field, value in zip(self.ordering_fields, position):
+            query |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        return query
+
+    def encode_cursor(self, position):
+        values = [value.isoformat() if hasattr(value, 'isoformat') else str(value) for value in position]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(values, list) or len(values) != len(self.ordering_fields):
+            raise NotFound(self.invalid_cursor_message)
+
+        timestamp = parse_datetime(values[0]) if isinstance(values[0], str) else None
+        if timestamp is None:
+            raise NotFound(self.invalid_cursor_message)
+        return [timestamp] + values[1:]
+
+
+class TimelinePagination(KeysetPagination):
+    """Keyset pages of a report's action log, newest entry first."""
+    ordering_fields = ('timestamp', 'id')
+    page_size = 50
+
+
+class OptionalKeysetPagination(PageNumberPagination):
+    """Page number pagination unless the client opts into keyset pagination."""
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.is_requested(request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def page_rows(self, queryset, request):
+        """
+        The rows of the requested page as a sliced queryset, found without
+        counting the list. None for pages that can't be (``?page=last``).
+        """
+        if self.keyset_class.is_requested(request):
+            return self.keyset_class().page_rows(queryset, request)
+        page_size = self.get_page_size(request)
+        if page_size is None:
+            return queryset
+        try:
+            number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            return None
+        if number < 1:
+            return None
+        start = (number - 1) * page_size
+        return queryset[start:start + page_size]
+
+    def is_counted(self, request):
+        """Whether the response carries the total count (and links that depend on it)."""
+        return not self.keyset_class.is_requested(request)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
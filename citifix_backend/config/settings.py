@@ -48,6 +48,7 @@ INSTALLED_APPS = [
     "users",
     "reports",
     "notifications",
+    "files",
 ]
 
 MIDDLEWARE = [
@@ -92,10 +93,100 @@ DATABASES = {
     }
 }
 
-CHANNELS_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer",
+# Cache shared by the worker processes. "locmem" only works within a single
+# process, so the caches that rely on it for invalidation are turned off; use
+# "database" (run manage.py createcachetable) or "redis" with several workers.
+# Websocket event replay also needs atomic counters, which only "redis" has.
+CACHE_BACKEND = config("CACHE_BACKEND", default="locmem")
+
+if CACHE_BACKEND == "redis":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": config("REDIS_URL", default="redis://127.0.0.1:6379/0"),
+        }
+    }
+elif CACHE_BACKEND == "database":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "citifix_cache",
+            # The default of 300 would cull the notification event log
+            "OPTIONS": {"MAX_ENTRIES": config("CACHE_MAX_ENTRIES", default=100000, cast=int)},
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Channel layer used by the websocket consumers. "memory" only works within a
+# single process; use "unix" (manage.py run_channel_broker) to share groups
+# between local worker processes or "redis" for multiple hosts.
+CHANNEL_LAYER_BACKEND = config("CHANNEL_LAYER_BACKEND", default="memory")
+
+if CHANNEL_LAYER_BACKEND == "redis":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": [config("REDIS_URL", default="redis://127.0.0.1:6379/0")],
+            },
+        }
+    }
+elif CHANNEL_LAYER_BACKEND == "unix":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "notifications.layers.UnixSocketChannelLayer",
+            "CONFIG": {
+                "path": config("CHANNEL_LAYER_SOCKET", default=str(BASE_DIR / "channels.sock")),
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
+        }
     }
+
+# Notification delivery runs on background worker threads after the
+# request's transaction commits. Set NOTIFICATION_DISPATCH_SYNC=True to send
+# inline (useful for tests).
+NOTIFICATION_DISPATCH = {
+    "SYNCHRONOUS": config("NOTIFICATION_DISPATCH_SYNC", default=False, cast=bool),
+    "QUEUE_SIZE": config("NOTIFICATION_QUEUE_SIZE", default=1000, cast=int),
+    "WORKERS": config("NOTIFICATION_WORKERS", default=2, cast=int),
+    "MAX_RETRIES": 2,
+    "RETRY_DELAY": 0.5,  # seconds, multiplied by the attempt number
+    "ENQUEUE_TIMEOUT": 0.05,  # seconds to wait on a full queue before dropping
+}
+
+# The last SIZE events of every user/role stream are kept in the CACHES backend
+# for TTL seconds so reconnecting dashboards can replay what they missed. The
+# senders and the websocket consumers must share that backend and it must
+# number events atomically, so replay is only on with "redis" (see CACHE_BACKEND).
+NOTIFICATION_EVENT_LOG = {
+    "SIZE": config("NOTIFICATION_EVENT_LOG_SIZE", default=200, cast=int),
+    "TTL": config("NOTIFICATION_EVENT_LOG_TTL", default=3600, cast=int),
+}
+
+# stats_update pushes are coalesced into at most one per interval (seconds)
+REPORT_STATS_PUSH_INTERVAL = config("REPORT_STATS_PUSH_INTERVAL", default=5, cast=float)
+
+# Largest batch accepted by POST /api/v1/reports/bulk/
+REPORT_BULK_MAX_SIZE = config("REPORT_BULK_MAX_SIZE", default=1000, cast=int)
+
+# Delta sync of my_reports / assigned_to_me (?since=). Deletions are kept as
+# tombstones for TOMBSTONE_RETENTION_DAYS; older sync tokens must resync.
+# Sync tokens stay SAFETY_MARGIN seconds behind the request so changes from
+# transactions that commit late are not skipped.
+REPORT_SYNC = {
+    "PAGE_SIZE": config("REPORT_SYNC_PAGE_SIZE", default=200, cast=int),
+    "TOMBSTONE_RETENTION_DAYS": config("REPORT_TOMBSTONE_RETENTION_DAYS", default=30, cast=int),
+    "SAFETY_MARGIN": config("REPORT_SYNC_SAFETY_MARGIN", default=60, cast=int),
 }
 
 # Password validation
@@ -117,6 +208,27 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# PBKDF2 work factor, at least 100000. Lowering it makes logins cheaper at the
+# cost of weaker hashes; weaker stored hashes are upgraded on the next login,
+# stronger ones are kept.
+PASSWORD_HASH_ITERATIONS = config("PASSWORD_HASH_ITERATIONS", default=0, cast=int) or None  # None: Django's default
+
+PASSWORD_HASHERS = [
+    "users.hashers.ConfigurablePBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+# last_login_at is written with a single column UPDATE on login. With
+# DEFERRED the writes are buffered and flushed every FLUSH_INTERVAL seconds.
+LOGIN_TRACKING = {
+    "DEFERRED": config("LOGIN_TRACKING_DEFERRED", default=False, cast=bool),
+    "FLUSH_INTERVAL": config("LOGIN_TRACKING_FLUSH_INTERVAL", default=5, cast=float),
+}
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -152,7 +264,7 @@ AUTH_USER_MODEL = "users.User"
 REST_FRAMEWORK = {
     # How users authenticate (JWT tokens)
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.CachedJWTAuthentication",
     ],
     # Require authentication by default
     "DEFAULT_PERMISSION_CLASSES": [
@@ -174,6 +286,22 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Users resolved from access tokens are cached per process for TTL seconds.
+# Status and profile changes evict them through the CACHES backend, so the
+# cache is only used when that backend is shared (see CACHE_BACKEND).
+AUTH_USER_CACHE = {
+    "TTL": config("AUTH_USER_CACHE_TTL", default=30, cast=int),
+    "MAX_ENTRIES": config("AUTH_USER_CACHE_SIZE", default=2048, cast=int),
+}
+
+# Report list pages are cached per process and shared by users who see the
+# same reports (media houses, admins). Report writes invalidate them through
+# the CACHES backend, so pages are only cached when that backend is shared.
+REPORT_RESPONSE_CACHE = {
+    "MAX_BYTES": config("REPORT_RESPONSE_CACHE_BYTES", default=32 * 1024 * 1024, cast=int),
+    "TTL": config("REPORT_RESPONSE_CACHE_TTL", default=30, cast=int),
+}
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
@@ -184,3 +312,28 @@ CORS_ALLOWED_ORIGINS = [
 # File Upload Settings - Maximum 10MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB in bytes
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB in bytes
+
+# Chunked media uploads are streamed to MEDIA_ROOT/uploads/partial and never
+# held in memory, so they are limited separately
+MEDIA_UPLOAD_MAX_SIZE = config("MEDIA_UPLOAD_MAX_SIZE", default=524288000, cast=int)  # 500MB
+MEDIA_UPLOAD_MAX_CHUNK_SIZE = config("MEDIA_UPLOAD_MAX_CHUNK_SIZE", default=8388608, cast=int)  # 8MB per request
+# Seconds a chunk request holds on to the upload offset before another request may take it over
+MEDIA_UPLOAD_CHUNK_TIMEOUT = config("MEDIA_UPLOAD_CHUNK_TIMEOUT", default=300, cast=int)
+
+# Files are served by files.views after a permission check. Set
+# PROTECTED_MEDIA_SERVER to "nginx" to hand the transfer to nginx with
+# X-Accel-Redirect (needs an internal location that aliases MEDIA_ROOT at
+# PROTECTED_MEDIA_INTERNAL_URL), or to "sendfile" for Apache/lighttpd
+# X-Sendfile. Left empty, Django streams the file itself.
+PROTECTED_MEDIA_SERVER = config("PROTECTED_MEDIA_SERVER", default="")
+PROTECTED_MEDIA_INTERNAL_URL = config("PROTECTED_MEDIA_INTERNAL_URL", default="/protected-media/")
+# Signed file links handed out by the API stay valid for one to two windows (seconds)
+FILE_ACCESS_LINK_WINDOW = config("FILE_ACCESS_LINK_WINDOW", default=3600, cast=int)
+
+# Thumbnails, web sized images and video poster frames are rendered in a
+# process pool after upload. Video posters need ffmpeg on the PATH.
+MEDIA_DERIVATIVES = {
+    "SYNCHRONOUS": config("MEDIA_DERIVATIVES_SYNC", default=False, cast=bool),
+    "WORKERS": config("MEDIA_DERIVATIVE_WORKERS", default=2, cast=int),
+    "FFMPEG": config("FFMPEG_BINARY", default="ffmpeg"),
+}
@@ -26,8 +26,9 @@ urlpatterns = [
     path('api/v1/reports/', include('reports.urls')),
     path('api/v1/documents/', include('users.document_urls')),
     path('api/v1/admin/', include('users.admin_urls')),
+    path('api/v1/files/', include('files.urls')),
 ]
 
+# Media is never served statically, it goes through the permission checked views in files
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
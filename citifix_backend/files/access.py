@@ -0,0 +1,39 @@
+import time
+from collections import namedtuple
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+
+SALT = 'files.access'
+
+Viewer = namedtuple('Viewer', ['id', 'user_type'])
+
+
+def link_expiry():
+    # Links are stable within a window so browsers can cache them by URL
+    window = settings.FILE_ACCESS_LINK_WINDOW
+    return (int(time.time()) // window + 2) * window
+
+
+def access_token(kind, object_id, user):
+    return signing.dumps([kind, str(object_id), str(user.id), user.user_type, link_expiry()], salt=SALT)
+
+
+def read_access_token(token, kind, object_id):
+    """Return the Viewer a link was issued to, or None if it is invalid, expired or for another file."""
+    try:
+        token_kind, token_object, user_id, user_type, expires = signing.loads(token, salt=SALT)
+    except (signing.BadSignature, ValueError, TypeError):
+        return None
+    if token_kind != kind or token_object != str(object_id) or expires < time.time():
+        return None
+    return Viewer(user_id, user_type)
+
+
+def protected_url(request, url_name, kind, object_id, **kwargs):
+    """Absolute URL of a protected file view, signed for the requesting user."""
+    url = reverse(url_name, kwargs=dict(kwargs, **{f'{kind}_id': object_id}))
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        url = f'{url}?access={access_token(kind, object_id, user)}'
+    return request.build_absolute_uri(url)
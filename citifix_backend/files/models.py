@@ -0,0 +1,13 @@
+from django.db import models
+
+
+class Blob(models.Model):
+    """One stored file in the content addressed store, shared by every field that references it."""
+    digest = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    ref_count = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
@@ -0,0 +1,128 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+from .storage import digest_from_name
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+RANGE_BLOCK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    Parse a single ``bytes=`` range into inclusive (start, end) offsets.
+    Returns None for anything we do not support (multiple ranges, other
+    units), in which case the whole file is sent as RFC 9110 allows.
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable
+        start, end = max(size - length, 0), size - 1
+
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(last_modified)
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        while length > 0:
+            block = handle.read(min(RANGE_BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def _local_response(request, path, size, etag, last_modified, content_type):
+    range_header = request.headers.get('Range')
+    if range_header and _if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range is not None:
+            start, end = byte_range
+            response = StreamingHttpResponse(_read_range(path, start, end - start + 1), status=206, content_type=content_type)
+            response['Content-Length'] = str(end - start + 1)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            return response
+
+    # Whole file: the WSGI server can use wsgi.file_wrapper (sendfile) for this
+    return FileResponse(open(path, 'rb'), content_type=content_type)
+
+
+def serve_file(request, storage, name, filename=None, as_attachment=False):
+    """
+    Send a stored file after the caller has checked permissions.
+
+    Conditional requests are answered with 304 from the file's metadata.
+    With PROTECTED_MEDIA_SERVER set the transfer itself is handed to the front
+    server (X-Accel-Redirect for nginx, X-Sendfile for Apache/lighttpd),
+    otherwise it is streamed from here with single range support.
+    """
+    path = storage.path(name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404('File not found')
+
+    # Content addressed files have their digest in the name, which makes a strong ETag
+    digest = digest_from_name(name)
+    etag = f'"{digest}"' if digest else f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        content_type = mimetypes.guess_type(filename or name)[0] or 'application/octet-stream'
+        server = settings.PROTECTED_MEDIA_SERVER
+
+        if server == 'nginx':
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = settings.PROTECTED_MEDIA_INTERNAL_URL + quote(name)
+        elif server == 'sendfile':
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = path
+        else:
+            response = _local_response(request, path, stat.st_size, etag, last_modified, content_type)
+
+        response['Accept-Ranges'] = 'bytes'
+        response['Content-Disposition'] = content_disposition_header(as_attachment, filename or os.path.basename(name))
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Files are private, so shared caches must not keep them and browsers must revalidate
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import re
+import tempfile
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+
+CAS_PREFIX = 'cas/'
+CAS_NAME = re.compile(r'^cas/[0-9a-f]{2}/[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})(?:\.\w{1,10})?$')
+
+
+def cas_name(digest, suggested_name=''):
+    ext = os.path.splitext(suggested_name)[1].lower()
+    if not re.fullmatch(r'\.\w{1,10}', ext):
+        ext = ''
+    return f'{CAS_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+
+
+def digest_from_name(name):
+    match = CAS_NAME.match(name or '')
+    return match.group('digest') if match else None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores each distinct file once, under ``cas/`` and named by its SHA-256.
+
+    Saving hashes the content while streaming it to a temporary file, then
+    either moves it into place or, when the same bytes are already stored,
+    drops the copy and adds a reference to the existing ``Blob``. Deleting a
+    name removes a reference, and the file goes once nothing points at it.
+
+    Names outside ``cas/`` (files saved before this storage was used) keep
+    plain file system behaviour.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content, see _save
+        return name
+
+    def _save(self, name, content):
+        hasher = hashlib.sha256()
+        size = 0
+        temporary_dir = os.path.join(self.location, CAS_PREFIX, 'tmp')
+        os.makedirs(temporary_dir, exist_ok=True)
+
+        handle, temporary = tempfile.mkstemp(dir=temporary_dir)
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    hasher.update(chunk)
+                    output.write(chunk)
+                    size += len(chunk)
+            # adopt() owns the temporary file from here on
+            return self.adopt(temporary, hasher.hexdigest(), size, name)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+    def adopt(self, path, digest, size, suggested_name=''):
+        """
+        Take ownership of a local file whose digest is already known, moving
+        it into the store (or discarding it when the content is stored
+        already). Returns the storage name.
+
+        The file is only moved once the transaction commits, so a rollback
+        leaves it where it was.
+        """
+        from .models import Blob
+
+        with transaction.atomic():
+            blob, created = Blob.objects.select_for_update().get_or_create(
+                digest=digest,
+                defaults={'name': cas_name(digest, suggested_name), 'size': size},
+            )
+            if not created:
+                Blob.objects.filter(digest=digest).update(ref_count=F('ref_count') + 1)
+            transaction.on_commit(lambda: self._place(path, blob.name))
+        return blob.name
+
+    def _place(self, path, name):
+        destination = self.path(name)
+        if os.path.exists(destination):
+            os.remove(path)
+        else:
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            os.replace(path, destination)
+
+    def delete(self, name):
+        digest = digest_from_name(name)
+        if digest is None:
+            return super().delete(name)
+
+        from .models import Blob
+
+        with transaction.atomic():
+            blob = Blob.objects.select_for_update().filter(digest=digest).first()
+            if blob is None:
+                return
+            Blob.objects.filter(digest=digest).update(ref_count=F('ref_count') - 1)
+            if blob.ref_count == 1:
+                # Only remove the file once the release is committed
+                transaction.on_commit(lambda: self._remove_unreferenced(digest))
+
+    def _remove_unreferenced(self, digest):
+        from .models import Blob
+
+        with transaction.atomic():
+            # The content may have been adopted again since it was released;
+            # adopt() waits on this lock and recreates the row once it is gone
+            blob = Blob.objects.select_for_update().filter(digest=digest).first()
+            if blob is not None and blob.ref_count == 0:
+                super().delete(blob.name)
+                blob.delete()
+
+
+_storage = None
+
+
+def content_addressed_storage():
+    global _storage
+    if _storage is None:
+        _storage = ContentAddressedStorage()
+    return _storage
+
+
+def file_releaser(field_name):
+    """Build a post_delete handler that drops the reference held by ``instance.<field_name>``."""
+    def release(sender, instance, **kwargs):
+        field_file = getattr(instance, field_name)
+        if field_file and field_file.name:
+            field_file.storage.delete(field_file.name)
+    return release
@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('media/<uuid:attachment_id>/', views.MediaFileView.as_view(), name='media_file'),
+    path('media/<uuid:attachment_id>/<slug:variant>/', views.MediaFileView.as_view(), name='media_derivative'),
+    path('documents/<uuid:document_id>/', views.DocumentFileView.as_view(), name='document_file'),
+]
@@ -0,0 +1,86 @@
+from django.core.files.storage import default_storage
+from django.http import Http404
+from rest_framework.exceptions import NotAuthenticated, PermissionDenied
+from rest_framework.permissions import AllowAny
+from rest_framework.views import APIView
+from reports.models import MediaAttachment
+from users.models import VerificationDocument
+from .access import Viewer, read_access_token
+from .serving import serve_file
+
+
+def can_view_attachment(viewer, attachment):
+    owners = {str(attachment['uploaded_by_id']), str(attachment['report__reporter_id']), str(attachment['report__assigned_to_id'])}
+    if viewer.user_type == 'superadmin' or viewer.id in owners:
+        return True
+    # Everyone else needs a public file on a report they can see
+    if not attachment['is_public']:
+        return False
+    return viewer.user_type in ('authority', 'media_house') and attachment['report__visibility'] == 'public'
+
+
+class ProtectedFileView(APIView):
+    """
+    Base view for stored files. Access is granted either by a signed
+    ``?access=`` link (what the serializers hand out, so files work in
+    <img> and <video> tags) or by the usual JWT authentication.
+    """
+    permission_classes = [AllowAny]
+    kind = None
+
+    def perform_authentication(self, request):
+        # Lazy: a signed link needs no user lookup at all
+        pass
+
+    def get_viewer(self, request, object_id):
+        token = request.query_params.get('access')
+        if token:
+            viewer = read_access_token(token, self.kind, object_id)
+            if viewer is None:
+                raise PermissionDenied('This link is invalid or has expired')
+            return viewer
+
+        user = request.user
+        if not user.is_authenticated:
+            raise NotAuthenticated()
+        return Viewer(str(user.id), user.user_type)
+
+
+class MediaFileView(ProtectedFileView):
+    kind = 'attachment'
+
+    def get(self, request, attachment_id, variant=None):
+        viewer = self.get_viewer(request, attachment_id)
+        attachment = MediaAttachment.objects.filter(id=attachment_id).values(
+            'file', 'derivatives', 'is_public', 'uploaded_by_id',
+            'report__reporter_id', 'report__assigned_to_id', 'report__visibility',
+        ).first()
+
+        # Hidden files look exactly like missing ones
+        if attachment is None or not can_view_attachment(viewer, attachment):
+            raise Http404('File not found')
+
+        if variant is None:
+            field = MediaAttachment._meta.get_field('file')
+            return serve_file(request, field.storage, attachment['file'])
+
+        derivative = (attachment['derivatives'] or {}).get(variant)
+        if derivative is None:
+            raise Http404('File not found')
+        return serve_file(request, default_storage, derivative['name'])
+
+
+class DocumentFileView(ProtectedFileView):
+    kind = 'document'
+
+    def get(self, request, document_id):
+        viewer = self.get_viewer(request, document_id)
+        document = VerificationDocument.objects.filter(id=document_id).values(
+            'document_file', 'document_name', 'user_id',
+        ).first()
+
+        if document is None or (viewer.user_type != 'superadmin' and viewer.id != str(document['user_id'])):
+            raise Http404('File not found')
+
+        field = VerificationDocument._meta.get_field('document_file')
+        return serve_file(request, field.storage, document['document_file'], filename=document['document_name'])
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from .layers import client_id_for_channel, read_frame, write_frame
+
+logger = logging.getLogger(__name__)
+
+
+class ChannelBroker:
+    """
+    Message router behind UnixSocketChannelLayer.
+
+    Each client binds its process-specific channels with its client id, and
+    messages for those channels are pushed to it straight away. Messages for
+    channels nobody is currently listening on are buffered until they expire.
+    Group membership lives here, so every worker process sees the same groups.
+    """
+
+    def __init__(self):
+        self.clients = {}
+        self.buffers = {}
+        self.waiters = {}
+        self.groups = {}
+        self.stats = {'messages': 0, 'delivered': 0, 'buffered': 0, 'expired': 0}
+
+    async def serve(self, path):
+        if os.path.exists(path):
+            os.remove(path)
+        server = await asyncio.start_unix_server(self.handle, path=path)
+        os.chmod(path, 0o660)
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                frame = await read_frame(reader)
+                if frame is None:
+                    break
+                reply = await self.dispatch(frame, writer)
+                await write_frame(writer, dict(reply, id=frame.get('id')))
+        except ConnectionError:
+            pass
+        finally:
+            self.disconnect(writer)
+            writer.close()
+
+    async def dispatch(self, frame, writer):
+        op = frame.get('op')
+
+        if op == 'send':
+            return await self.send(frame['channel'], frame['message'], frame.get('expiry', 60), frame.get('capacity', 100))
+        if op == 'bind':
+            self.clients[frame['client']] = writer
+            await self.drain_buffers(frame['client'], writer)
+            return {'ok': True}
+        if op == 'receive':
+            message = self.pop_buffered(frame['channel'])
+            if message is None:
+                self.waiters.setdefault(frame['channel'], deque()).append(writer)
+            else:
+                await self.deliver(writer, frame['channel'], message)
+            return {'ok': True}
+        if op == 'group_add':
+            self.groups.setdefault(frame['group'], {})[frame['channel']] = time.time() + frame.get('expiry', 86400)
+            return {'ok': True}
+        if op == 'group_discard':
+            members = self.groups.get(frame['group'], {})
+            members.pop(frame['channel'], None)
+            if not members:
+                self.groups.pop(frame['group'], None)
+            return {'ok': True}
+        if op == 'group_send':
+            now = time.time()
+            members = self.groups.get(frame['group'], {})
+            for channel, expires in list(members.items()):
+                if expires < now:
+                    members.pop(channel, None)
+                    continue
+                await self.send(channel, frame['message'], frame.get('expiry', 60), None)
+            return {'ok': True}
+        if op == 'flush':
+            self.buffers.clear()
+            self.groups.clear()
+            return {'ok': True}
+
+        return {'error': f'unknown op {op!r}'}
+
+    async def send(self, channel, message, expiry, capacity):
+        self.stats['messages'] += 1
+        target = self.target(channel)
+        if target is not None:
+            await self.deliver(target, channel, message)
+            return {'ok': True}
+
+        buffer = self.buffers.setdefault(channel, deque())
+        self.expire(channel, buffer)
+        if capacity is not None and len(buffer) >= capacity:
+            return {'error': 'full'}
+        buffer.append((time.time() + expiry, message))
+        self.stats['buffered'] += 1
+        return {'ok': True}
+
+    def target(self, channel):
+        if '!' in channel:
+            return self.clients.get(client_id_for_channel(channel))
+
+        waiters = self.waiters.get(channel)
+        while waiters:
+            writer = waiters.popleft()
+            if not writer.is_closing():
+                return writer
+        return None
+
+    async def deliver(self, writer, channel, message):
+        try:
+            await write_frame(writer, {'channel': channel, 'message': message})
+            self.stats['delivered'] += 1
+        except ConnectionError:
+            logger.warning('Dropped message for %s, client disconnected', channel)
+
+    async def drain_buffers(self, client_id, writer):
+        for channel in [name for name in self.buffers if '!' in name and client_id_for_channel(name) == client_id]:
+            buffer = self.buffers.pop(channel)
+            self.expire(channel, buffer)
+            for _, message in buffer:
+                await self.deliver(writer, channel, message)
+
+    def pop_buffered(self, channel):
+        buffer = self.buffers.get(channel)
+        if not buffer:
+            return None
+        self.expire(channel, buffer)
+        if not buffer:
+            self.buffers.pop(channel, None)
+            return None
+        return buffer.popleft()[1]
+
+    def expire(self, channel, buffer):
+        now = time.time()
+        while buffer and buffer[0][0] < now:
+            buffer.popleft()
+            self.stats['expired'] += 1
+            # Like the other layers, a channel with expired messages is assumed dead
+            for members in self.groups.values():
+                members.pop(channel, None)
+
+    def disconnect(self, writer):
+        for client_id in [key for key, value in self.clients.items() if value is writer]:
+            self.clients.pop(client_id)
+            # The worker process is gone, and so are its channels
+            for group, members in list(self.groups.items()):
+                for channel in [name for name in members if '!' in name and client_id_for_channel(name) == client_id]:
+                    members.pop(channel)
+                if not members:
+                    self.groups.pop(group)
+        for channel, waiters in list(self.waiters.items()):
+            remaining = deque(waiter for waiter in waiters if waiter is not writer)
+            if remaining:
+                self.waiters[channel] = remaining
+            else:
+                self.waiters.pop(channel)
@@ -1,47 +1,122 @@
 import json
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
+from .events import event_log
 
 User = get_user_model()
 
+def user_group(user_id):
+    return f"user_{user_id}"
+
+def role_group(user_type):
+    return f"role_{user_type}"
+
+def parse_resume(query_string):
+    """Last seen sequence number per stream from ``?resume=<stream>:<seq>,...``."""
+    positions = {}
+    for value in parse_qs(query_string.decode()).get('resume', []):
+        for item in value.split(','):
+            stream, _, seq = item.rpartition(':')
+            if stream and seq.isdigit():
+                positions[stream] = int(seq)
+    return positions
+
 class DashboardConsumer(AsyncWebsocketConsumer):
+    """
+    Pushes report events to a dashboard. Events carry the ``stream`` (group)
+    they were sent to and their ``seq`` in it. A client reconnecting with
+    ``?resume=<stream>:<seq>,...`` first gets the events it missed, or a
+    ``resync_required`` message for a stream whose missed events are no
+    longer buffered, then a ``streams`` message with the latest numbers.
+    When the event log is disabled nothing is replayed and ``streams`` is empty.
+    """
     async def connect(self):
         self.user = self.scope["user"]
+        self.subscribed_groups = []
+        self.replayed_up_to = {}
         
         if self.user.is_authenticated:
-            await self.channel_layer.group_add(
-                f"user_{self.user.id}",
-                self.channel_name
-            )
+            self.subscribed_groups.append(user_group(self.user.id))
+            # Active users also join their role's broadcast group so a single
+            # group_send reaches every authority/superadmin. A status change
+            # later on is picked up through membership_update.
+            if self.user.status == 'active':
+                self.subscribed_groups.append(role_group(self.user.user_type))
+            
+            for group in self.subscribed_groups:
+                await self.channel_layer.group_add(group, self.channel_name)
             await self.accept()
+            # Group messages queue up until connect() returns, so live events
+            # always follow the replayed ones
+            await self.resume(parse_resume(self.scope.get('query_string', b'')))
         else:
             await self.close()
 
+    async def resume(self, positions):
+        if not event_log.enabled:
+            await self.send(text_data=json.dumps({'type': 'streams', 'streams': {}}))
+            return
+        latest = await sync_to_async(event_log.latest)(self.subscribed_groups)
+        for stream in self.subscribed_groups:
+            if stream not in positions:
+                continue
+            events = await sync_to_async(event_log.replay)(stream, positions[stream])
+            if events is None:
+                await self.send(text_data=json.dumps({'type': 'resync_required', 'stream': stream}))
+                continue
+            for event in events:
+                await getattr(self, event['type'])(event)
+            self.replayed_up_to[stream] = events[-1]['seq'] if events else positions[stream]
+        await self.send(text_data=json.dumps({'type': 'streams', 'streams': latest}))
+
     async def disconnect(self, close_code):
-        if hasattr(self, 'user') and self.user.is_authenticated:
-            await self.channel_layer.group_discard(
-                f"user_{self.user.id}",
-                self.channel_name
-            )
+        for group in getattr(self, 'subscribed_groups', []):
+            await self.channel_layer.group_discard(group, self.channel_name)
 
     async def receive(self, text_data):
         pass
 
+    async def forward(self, event, message):
+        if 'seq' in event:
+            # Already sent by the replay
+            if event['seq'] <= self.replayed_up_to.get(event['stream'], 0):
+                return
+            message = dict(message, stream=event['stream'], seq=event['seq'])
+        await self.send(text_data=json.dumps(message))
+
     async def send_notification(self, event):
-        await self.send(text_data=json.dumps(event["data"]))
+        await self.forward(event, event["data"])
 
     async def report_update(self, event):
-        await self.send(text_data=json.dumps({
+        await self.forward(event, {
             'type': 'report_update',
             'data': event["data"]
-        }))
+        })
 
     async def new_report(self, event):
-        await self.send(text_data=json.dumps({
+        await self.forward(event, {
             'type': 'new_report',
             'data': event["data"]
-        }))
+        })
+
+    async def new_reports(self, event):
+        await self.forward(event, {
+            'type': 'new_reports',
+            'data': event["data"]
+        })
+
+    async def membership_update(self, event):
+        user = await sync_to_async(User.objects.filter(id=self.user.id).only('status', 'user_type').first)()
+        group = role_group(self.user.user_type)
+        active = user is not None and user.status == 'active'
+        if active and group not in self.subscribed_groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+            self.subscribed_groups.append(group)
+        elif not active and group in self.subscribed_groups:
+            await self.channel_layer.group_discard(group, self.channel_name)
+            self.subscribed_groups.remove(group)
 
     async def stats_update(self, event):
         await self.send(text_data=json.dumps({
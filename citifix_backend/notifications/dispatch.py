@@ -0,0 +1,143 @@
+import logging
+import os
+import queue
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'SYNCHRONOUS': False,
+    'QUEUE_SIZE': 1000,
+    'WORKERS': 2,
+    'MAX_RETRIES': 2,
+    'RETRY_DELAY': 0.5,
+    'ENQUEUE_TIMEOUT': 0.05,
+}
+
+
+def dispatch_setting(name):
+    return getattr(settings, 'NOTIFICATION_DISPATCH', {}).get(name, DEFAULTS[name])
+
+
+class NotificationDispatcher:
+    """
+    Runs notification sends on background worker threads.
+
+    Jobs go through a bounded queue. When the queue stays full for longer than
+    ENQUEUE_TIMEOUT the job is dropped and counted rather than blocking the
+    request. Failed jobs are retried MAX_RETRIES times, skipping the steps
+    (run_step) that already succeeded. With SYNCHRONOUS enabled (tests,
+    management commands) jobs run inline.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pid = None
+        self._queue = None
+        self.counters = {'queued': 0, 'sent': 0, 'dropped': 0, 'retried': 0, 'failed': 0}
+
+    def dispatch_on_commit(self, func, *args, **kwargs):
+        transaction.on_commit(lambda: self.submit(func, *args, **kwargs))
+
+    def submit(self, func, *args, **kwargs):
+        if dispatch_setting('SYNCHRONOUS'):
+            self._run(func, args, kwargs)
+            return True
+
+        job_queue = self._ensure_workers()
+        try:
+            job_queue.put((func, args, kwargs), timeout=dispatch_setting('ENQUEUE_TIMEOUT'))
+        except queue.Full:
+            self._increment('dropped')
+            logger.warning('Notification queue full, dropped %s', getattr(func, '__name__', func))
+            return False
+
+        self._increment('queued')
+        return True
+
+    def join(self):
+        """Block until every queued job has been processed."""
+        if self._queue is not None and self._pid == os.getpid():
+            self._queue.join()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats['pending'] = self._queue.qsize() if self._queue is not None else 0
+        return stats
+
+    def _ensure_workers(self):
+        # Workers are started lazily and restarted in forked worker processes
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._queue = queue.Queue(maxsize=dispatch_setting('QUEUE_SIZE'))
+                for index in range(dispatch_setting('WORKERS')):
+                    thread = threading.Thread(
+                        target=self._worker,
+                        args=(self._queue,),
+                        name=f'notification-dispatch-{index}',
+                        daemon=True,
+                    )
+                    thread.start()
+            return self._queue
+
+    def _worker(self, job_queue):
+        while True:
+            func, args, kwargs = job_queue.get()
+            try:
+                self._run(func, args, kwargs)
+            finally:
+                close_old_connections()
+                job_queue.task_done()
+
+    def run_step(self, key, func, *args):
+        """
+        Run one side effect of the current job (a group_send). When the job is
+        retried, steps that already succeeded are skipped instead of repeated
+        and return their first result.
+        """
+        job = getattr(self._local, 'job', None)
+        if job is None:
+            return func(*args)
+        # The same key may legitimately occur more than once per attempt
+        occurrence = job['seen'][key] = job['seen'].get(key, 0) + 1
+        step = (key, occurrence)
+        if step not in job['done']:
+            job['done'][step] = func(*args)
+        return job['done'][step]
+
+    def _run(self, func, args, kwargs):
+        max_retries = dispatch_setting('MAX_RETRIES')
+        self._local.job = {'done': {}, 'seen': {}}
+        try:
+            self._attempt(func, args, kwargs, max_retries)
+        finally:
+            self._local.job = None
+
+    def _attempt(self, func, args, kwargs, max_retries):
+        for attempt in range(max_retries + 1):
+            self._local.job['seen'] = {}
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                if attempt < max_retries:
+                    self._increment('retried')
+                    time.sleep(dispatch_setting('RETRY_DELAY') * (attempt + 1))
+                    continue
+                self._increment('failed')
+                logger.exception('Notification %s failed', getattr(func, '__name__', func))
+                return
+            self._increment('sent')
+            return
+
+    def _increment(self, counter):
+        with self._lock:
+            self.counters[counter] += 1
+
+
+dispatcher = NotificationDispatcher()
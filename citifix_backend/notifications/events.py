@@ -0,0 +1,108 @@
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from config.caches import has_atomic_incr
+
+SEQUENCE_KEY = 'notifications:seq:{}'
+ENTRY_KEY = 'notifications:event:{}:{}'
+
+DEFAULTS = {
+    'SIZE': 200,
+    'TTL': 3600,
+}
+
+
+def event_log_setting(name):
+    return getattr(settings, 'NOTIFICATION_EVENT_LOG', {}).get(name, DEFAULTS[name])
+
+
+class EventLog:
+    """
+    Ring buffer of the last SIZE events sent to each stream (a user or role
+    group), kept in the Django cache so the processes that send events and
+    the ones running the websocket consumers share it.
+
+    Every event gets the next sequence number of its stream. A reconnecting
+    client passes the last number it saw per stream and gets the events it
+    missed, unless some of them have been overwritten or expired, in which
+    case it has to reload instead.
+
+    Replay needs a cache backend shared by all processes whose incr() is
+    atomic, so concurrent senders never get the same number; with any other
+    one events are sent without numbers and nothing is logged.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {'appended': 0, 'replayed': 0, 'resyncs': 0}
+
+    @property
+    def enabled(self):
+        return has_atomic_incr()
+
+    def append(self, stream, event):
+        """Number the event in its stream and store it. Returns the sequence number."""
+        sequence_key = SEQUENCE_KEY.format(stream)
+        self._start(sequence_key)
+        seq = cache.incr(sequence_key)
+        cache.set(ENTRY_KEY.format(stream, seq % event_log_setting('SIZE')), dict(event, seq=seq), event_log_setting('TTL'))
+        self._increment('appended')
+        return seq
+
+    def latest(self, streams):
+        """Last sequence number of each stream, starting the counters of streams without events."""
+        keys = {SEQUENCE_KEY.format(stream): stream for stream in streams}
+        values = cache.get_many(keys)
+        missing = [key for key in keys if key not in values]
+        if missing:
+            for key in missing:
+                self._start(key)
+            values.update(cache.get_many(missing))
+        return {stream: values.get(key) for key, stream in keys.items()}
+
+    def replay(self, stream, after):
+        """Events of the stream after sequence number ``after``, or None when they are no longer all buffered."""
+        latest = cache.get(SEQUENCE_KEY.format(stream))
+        if latest is None:
+            # Nothing sent yet, or the log was flushed
+            return self._resync() if after else []
+        if after > latest:
+            return self._resync()
+        if latest == after:
+            return []
+        size = event_log_setting('SIZE')
+        if latest - after > size:
+            return self._resync()
+
+        keys = [ENTRY_KEY.format(stream, seq % size) for seq in range(after + 1, latest + 1)]
+        entries = cache.get_many(keys)
+        events = []
+        for seq, key in zip(range(after + 1, latest + 1), keys):
+            event = entries.get(key)
+            # Overwritten or expired (or, rarely, numbered but not stored yet)
+            if event is None or event['seq'] != seq:
+                return self._resync()
+            events.append(event)
+        self._increment('replayed', len(events))
+        return events
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+    def _start(self, sequence_key):
+        # A new or flushed counter starts at the clock in ms, above any number
+        # handed out before, so old clients can't mistake new events for theirs
+        cache.add(sequence_key, int(time.time() * 1000), None)
+
+    def _resync(self):
+        self._increment('resyncs')
+        return None
+
+    def _increment(self, counter, amount=1):
+        with self._lock:
+            self.counters[counter] += amount
+
+
+event_log = EventLog()
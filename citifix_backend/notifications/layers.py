@@ -0,0 +1,266 @@
+import asyncio
+import itertools
+import os
+import struct
+import threading
+import uuid
+import msgpack
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+
+FRAME_HEADER = struct.Struct('!I')
+RECONNECT_DELAY = 0.5
+
+
+async def read_frame(reader):
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+        payload = await reader.readexactly(FRAME_HEADER.unpack(header)[0])
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    return msgpack.unpackb(payload, raw=False)
+
+
+async def write_frame(writer, frame):
+    payload = msgpack.packb(frame, use_bin_type=True)
+    writer.write(FRAME_HEADER.pack(len(payload)) + payload)
+    await writer.drain()
+
+
+def client_id_for_channel(channel):
+    # Process-specific channels look like "<prefix>.<client_id>!<suffix>"
+    return channel.split('!', 1)[0].rsplit('.', 1)[-1]
+
+
+class _Connection:
+    """A broker connection owned by one event loop."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.bound = False
+        # Only channels with a receive() on this loop get a queue
+        self.queues = {}
+        self.pending = {}
+        self.request_ids = itertools.count()
+        self.closed = asyncio.Event()
+        self.reader_task = asyncio.ensure_future(self._read())
+
+    async def request(self, frame):
+        request_id = next(self.request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        try:
+            await write_frame(self.writer, dict(frame, id=request_id))
+            return await future
+        finally:
+            self.pending.pop(request_id, None)
+
+    async def close(self):
+        self.reader_task.cancel()
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def _read(self):
+        try:
+            while True:
+                frame = await read_frame(self.reader)
+                if frame is None:
+                    break
+                if 'channel' in frame:
+                    queue = self.queues.get(frame['channel'])
+                    if queue is not None:
+                        queue.put_nowait(frame['message'])
+                elif frame.get('id') in self.pending:
+                    self.pending[frame['id']].set_result(frame)
+        finally:
+            self.closed.set()
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError('Channel broker connection lost'))
+
+
+class _Sender:
+    """
+    One broker connection on its own event loop thread, for sends from loops
+    that don't receive (async_to_sync creates a new loop per call).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.pid = os.getpid()
+        self.loop = asyncio.new_event_loop()
+        self.connection = None
+        self.lock = None
+        threading.Thread(target=self.loop.run_forever, name='channel-layer-sender', daemon=True).start()
+
+    async def request(self, frame):
+        future = asyncio.run_coroutine_threadsafe(self._request(frame), self.loop)
+        return await asyncio.wrap_future(future)
+
+    async def _request(self, frame):
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        async with self.lock:
+            if self.connection is None or self.connection.closed.is_set():
+                reader, writer = await asyncio.open_unix_connection(self.path)
+                self.connection = _Connection(reader, writer)
+            connection = self.connection
+        return await connection.request(frame)
+
+
+class UnixSocketChannelLayer(BaseChannelLayer):
+    """
+    Channel layer backed by a broker process listening on a Unix socket
+    (``manage.py run_channel_broker``), so several local ASGI worker processes
+    can share groups without running Redis.
+
+    The event loop that receives messages keeps a long-lived connection.
+    Sends from other loops (for example through async_to_sync) share one
+    connection owned by a sender thread. Group memberships are recorded and
+    re-added whenever the receiving connection binds, because the broker
+    drops a client's memberships when its connection is lost.
+    """
+
+    extensions = ['groups', 'flush']
+
+    def __init__(self, path, expiry=60, group_expiry=86400, capacity=100, channel_capacity=None, **kwargs):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity, **kwargs)
+        self.path = str(path)
+        self.group_expiry = group_expiry
+        self.client_id = uuid.uuid4().hex[:12]
+        self._connections = {}
+        self._locks = {}
+        self._memberships = set()
+        self._sender = None
+        self._sender_lock = threading.Lock()
+
+    # Channel layer API
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), 'message is not a dict'
+        self.require_valid_channel_name(channel)
+        reply = await self._request({
+            'op': 'send',
+            'channel': channel,
+            'message': message,
+            'capacity': self.get_capacity(channel),
+            'expiry': self.expiry,
+        })
+        if reply.get('error') == 'full':
+            raise ChannelFull(channel)
+
+    async def receive(self, channel):
+        self.require_valid_channel_name(channel)
+
+        while True:
+            try:
+                connection = await self._receiver_connection()
+            except OSError:
+                # The broker is restarting
+                await asyncio.sleep(RECONNECT_DELAY)
+                continue
+            queue = connection.queues.setdefault(channel, asyncio.Queue())
+            if not queue.empty():
+                return queue.get_nowait()
+
+            try:
+                if '!' in channel:
+                    if not connection.bound:
+                        await self._bind(connection)
+                else:
+                    await connection.request({'op': 'receive', 'channel': channel})
+            except ConnectionError:
+                await asyncio.sleep(RECONNECT_DELAY)
+                continue
+
+            getter = asyncio.ensure_future(queue.get())
+            closed = asyncio.ensure_future(connection.closed.wait())
+            try:
+                await asyncio.wait({getter, closed}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                closed.cancel()
+                if not getter.done():
+                    getter.cancel()
+
+            if getter.done() and not getter.cancelled():
+                return getter.result()
+            # The broker went away; reconnect and wait again
+
+    async def new_channel(self, prefix='specific'):
+        return f'{prefix}.{self.client_id}!{uuid.uuid4().hex[:12]}'
+
+    async def flush(self):
+        self._memberships.clear()
+        await self._request({'op': 'flush'})
+
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        connection = self._connections.pop(loop, None)
+        if connection is not None:
+            connection.queues.clear()
+            await connection.close()
+
+    # Groups extension
+
+    async def group_add(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        self._memberships.add((group, channel))
+        await self._request({'op': 'group_add', 'group': group, 'channel': channel, 'expiry': self.group_expiry})
+
+    async def group_discard(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        self._memberships.discard((group, channel))
+        if not any(member == channel for _, member in self._memberships):
+            # Left its last group, so the consumer is done with the channel
+            for connection in self._connections.values():
+                connection.queues.pop(channel, None)
+        await self._request({'op': 'group_discard', 'group': group, 'channel': channel})
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), 'Message is not a dict'
+        self.require_valid_group_name(group)
+        await self._request({'op': 'group_send', 'group': group, 'message': message, 'expiry': self.expiry})
+
+    # Connection handling
+
+    async def _receiver_connection(self):
+        loop = asyncio.get_running_loop()
+        lock = self._locks.setdefault(loop, asyncio.Lock())
+
+        async with lock:
+            connection = self._connections.get(loop)
+            if connection is None or connection.closed.is_set():
+                # Forget connections that belonged to loops which are gone
+                for other_loop in [other for other in self._connections if other.is_closed()]:
+                    self._connections.pop(other_loop, None)
+                    self._locks.pop(other_loop, None)
+                reader, writer = await asyncio.open_unix_connection(self.path)
+                connection = _Connection(reader, writer)
+                self._connections[loop] = connection
+            return connection
+
+    async def _bind(self, connection):
+        await connection.request({'op': 'bind', 'client': self.client_id})
+        # A new connection means the broker dropped our group memberships
+        for group, channel in list(self._memberships):
+            await connection.request({'op': 'group_add', 'group': group, 'channel': channel, 'expiry': self.group_expiry})
+        connection.bound = True
+
+    async def _request(self, frame):
+        connection = self._connections.get(asyncio.get_running_loop())
+        if connection is not None and not connection.closed.is_set():
+            return await connection.request(frame)
+        return await self._process_sender().request(frame)
+
+    def _process_sender(self):
+        # Threads don't survive a fork, each worker process starts its own
+        with self._sender_lock:
+            if self._sender is None or self._sender.pid != os.getpid():
+                self._sender = _Sender(self.path)
+            return self._sender
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import statistics
+import time
+from asgiref.testing import ApplicationCommunicator
+from channels.layers import get_channel_layer
+from django.core.management.base import BaseCommand, CommandError
+from notifications.consumers import DashboardConsumer, role_group
+from users.models import User
+
+EVENT_TYPES = ('new_report', 'report_update')
+
+
+class Command(BaseCommand):
+    help = (
+        'Open N DashboardConsumer websocket clients on the configured channel layer '
+        'and measure broadcast latency and throughput'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=100)
+        parser.add_argument('--events', type=int, default=50, help='Broadcasts sent per event type')
+        parser.add_argument('--event-type', choices=EVENT_TYPES + ('all',), default='all')
+        parser.add_argument('--timeout', type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        if options['clients'] < 1 or options['events'] < 1:
+            raise CommandError('--clients and --events must be positive')
+
+        event_types = EVENT_TYPES if options['event_type'] == 'all' else (options['event_type'],)
+        asyncio.run(self.run(options['clients'], options['events'], event_types, options['timeout']))
+
+    async def run(self, client_count, event_count, event_types, timeout):
+        layer = get_channel_layer()
+        self.stdout.write(f'Channel layer: {layer.__class__.__name__}')
+
+        connect_started = time.perf_counter()
+        clients = [await self.connect(index) for index in range(client_count)]
+        self.stdout.write(f'Connected {client_count} clients in {time.perf_counter() - connect_started:.2f}s')
+
+        try:
+            for event_type in event_types:
+                await self.measure(layer, clients, event_type, event_count, timeout)
+        finally:
+            for client in clients:
+                await client.send_input({'type': 'websocket.disconnect', 'code': 1000})
+                await client.wait(timeout)
+
+    async def connect(self, index):
+        # Unsaved users: the consumer only needs the id, type and status
+        user = User(email=f'loadtest-{index}@example.com', user_type='authority', status='active')
+        client = ApplicationCommunicator(DashboardConsumer.as_asgi(), {
+            'type': 'websocket',
+            'path': '/ws/dashboard/',
+            'headers': [],
+            'query_string': b'',
+            'subprotocols': [],
+            'user': user,
+        })
+        await client.send_input({'type': 'websocket.connect'})
+        response = await client.receive_output(5)
+        if response['type'] != 'websocket.accept':
+            raise CommandError(f'Client {index} was not accepted: {response}')
+        # The latest sequence numbers, sent once connected
+        await client.receive_output(5)
+        return client
+
+    async def collect(self, client, event_count, latencies, timeout):
+        received = 0
+        deadline = time.perf_counter() + timeout
+        while received < event_count and time.perf_counter() < deadline:
+            try:
+                output = await client.receive_output(deadline - time.perf_counter())
+            except asyncio.TimeoutError:
+                break
+            if output['type'] != 'websocket.send':
+                continue
+            payload = json.loads(output['text'])
+            latencies.append(time.perf_counter() - payload['data']['sent_at'])
+            received += 1
+        return received
+
+    async def measure(self, layer, clients, event_type, event_count, timeout):
+        latencies = []
+        collectors = [
+            asyncio.ensure_future(self.collect(client, event_count, latencies, timeout))
+            for client in clients
+        ]
+
+        started = time.perf_counter()
+        for index in range(event_count):
+            await layer.group_send(role_group('authority'), {
+                'type': event_type,
+                'data': {'id': str(index), 'message': 'load test', 'sent_at': time.perf_counter()},
+            })
+        send_elapsed = time.perf_counter() - started
+
+        received = sum(await asyncio.gather(*collectors))
+        elapsed = time.perf_counter() - started
+        expected = event_count * len(clients)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{event_type}'))
+        self.stdout.write(f'  delivered      {received}/{expected}')
+        self.stdout.write(f'  send rate      {event_count / send_elapsed:.0f} broadcasts/s')
+        self.stdout.write(f'  throughput     {received / elapsed:.0f} messages/s')
+        if latencies:
+            latencies.sort()
+            self.stdout.write(f'  latency p50    {statistics.median(latencies) * 1000:.2f} ms')
+            self.stdout.write(f'  latency p95    {latencies[int(len(latencies) * 0.95) - 1] * 1000:.2f} ms')
+            self.stdout.write(f'  latency p99    {latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f} ms')
+            self.stdout.write(f'  latency max    {latencies[-1] * 1000:.2f} ms')
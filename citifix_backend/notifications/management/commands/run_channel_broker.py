@@ -0,0 +1,20 @@
+import asyncio
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from notifications.broker import ChannelBroker
+
+
+class Command(BaseCommand):
+    help = 'Run the Unix socket broker used by UnixSocketChannelLayer'
+
+    def add_arguments(self, parser):
+        default_path = settings.CHANNEL_LAYERS['default'].get('CONFIG', {}).get('path')
+        parser.add_argument('--socket', default=default_path, help='Path of the Unix socket to listen on')
+
+    def handle(self, *args, **options):
+        path = options['socket'] or str(settings.BASE_DIR / 'channels.sock')
+        self.stdout.write(f'Channel broker listening on {path}')
+        try:
+            asyncio.run(ChannelBroker().serve(path))
+        except KeyboardInterrupt:
+            pass
@@ -3,101 +3,122 @@ from channels.layers import get_channel_layer
 from reports.models import Report
 from reports.serializers import ReportSerializer
 from django.utils import timezone
-import time
+from .consumers import role_group, user_group
+from .dispatch import dispatcher
+from .events import event_log
+
+NEW_REPORTS_SUMMARY_LIMIT = 50
 
 class NotificationService:
+    @staticmethod
+    def _group_send(group, event_type, data, replayable=True):
+        event = {
+            "type": event_type,
+            "data": data
+        }
+        # Numbered and buffered so reconnecting dashboards can catch up. A
+        # retried job reuses the number and skips groups it already reached.
+        if replayable and event_log.enabled:
+            event["stream"] = group
+            event["seq"] = dispatcher.run_step(('append', group, event_type), event_log.append, group, event)
+        channel_layer = get_channel_layer()
+        dispatcher.run_step(('send', group, event_type), async_to_sync(channel_layer.group_send), group, event)
+
+    @staticmethod
+    def _report_summary(report, message):
+        return {
+            'id': str(report.id),
+            'title': report.title,
+            'severity': report.severity,
+            'type': report.report_type,
+            'message': message
+        }
+
     @staticmethod
     def send_report_update(report_id, user_id=None):
         try:
-            report = Report.objects.get(id=report_id)
-            channel_layer = get_channel_layer()
-            
-            serializer = ReportSerializer(report)
-            
-            if user_id:
-                async_to_sync(channel_layer.group_send)(
-                    f"user_{user_id}",
-                    {
-                        "type": "report_update",
-                        "data": serializer.data
-                    }
-                )
-            
-            # Send to all authorities for critical reports
-            if report.severity == 'critical':
-                from users.models import User
-                authorities = User.objects.filter(user_type='authority', status='active')
-                for authority in authorities:
-                    async_to_sync(channel_layer.group_send)(
-                        f"user_{authority.id}",
-                        {
-                            "type": "new_report",
-                            "data": {
-                                'id': str(report.id),
-                                'title': report.title,
-                                'severity': report.severity,
-                                'type': report.report_type,
-                                'message': f'New critical report: {report.title}'
-                            }
-                        }
-                    )
-                    
+            report = Report.objects.select_related('reporter', 'assigned_to').get(id=report_id)
         except Report.DoesNotExist:
-            pass
+            return
+        
+        if user_id:
+            serializer = ReportSerializer(report)
+            NotificationService._group_send(user_group(user_id), "report_update", serializer.data)
+        
+        # Send to all authorities for critical reports
+        if report.severity == 'critical':
+            NotificationService._group_send(
+                role_group('authority'),
+                "new_report",
+                NotificationService._report_summary(report, f'New critical report: {report.title}')
+            )
 
     @staticmethod
     def send_new_report_notification(report):
-        channel_layer = get_channel_layer()
-        
         # Notify superadmins
-        from users.models import User
-        superadmins = User.objects.filter(user_type='superadmin', status='active')
+        NotificationService._group_send(
+            role_group('superadmin'),
+            "new_report",
+            NotificationService._report_summary(report, f'New report submitted: {report.title}')
+        )
+        
+        # Notify authorities for critical reports
+        if report.severity == 'critical':
+            NotificationService._group_send(
+                role_group('authority'),
+                "new_report",
+                NotificationService._report_summary(report, f'New critical report: {report.title}')
+            )
+
+    @staticmethod
+    def send_new_reports_notification(reports):
+        # One message per batch, whatever its size. Only the first
+        # NEW_REPORTS_SUMMARY_LIMIT reports are listed, clients refetch for the rest.
+        summaries = [
+            NotificationService._report_summary(report, f'New report submitted: {report.title}')
+            for report in reports[:NEW_REPORTS_SUMMARY_LIMIT]
+        ]
+        NotificationService._group_send(
+            role_group('superadmin'),
+            "new_reports",
+            {'count': len(reports), 'reports': summaries, 'message': f'{len(reports)} new reports submitted'}
+        )
         
-        for admin in superadmins:
-            async_to_sync(channel_layer.group_send)(
-                f"user_{admin.id}",
+        critical = [report for report in reports if report.severity == 'critical']
+        if critical:
+            NotificationService._group_send(
+                role_group('authority'),
+                "new_reports",
                 {
-                    "type": "new_report",
-                    "data": {
-                        'id': str(report.id),
-                        'title': report.title,
-                        'severity': report.severity,
-                        'type': report.report_type,
-                        'message': f'New report submitted: {report.title}'
-                    }
+                    'count': len(critical),
+                    'reports': [
+                        NotificationService._report_summary(report, f'New critical report: {report.title}')
+                        for report in critical[:NEW_REPORTS_SUMMARY_LIMIT]
+                    ],
+                    'message': f'{len(critical)} new critical reports'
                 }
             )
-        
-        # Notify authorities for critical reports
-        if report.severity == 'critical':
-            authorities = User.objects.filter(user_type='authority', status='active')
-            for authority in authorities:
-                async_to_sync(channel_layer.group_send)(
-                    f"user_{authority.id}",
-                    {
-                        "type": "new_report",
-                        "data": {
-                            'id': str(report.id),
-                            'title': report.title,
-                            'severity': report.severity,
-                            'type': report.report_type,
-                            'message': f'New critical report: {report.title}'
-                        }
-                    }
-                )
+
+    @staticmethod
+    def send_stats_update(stats, user_types):
+        for user_type in user_types:
+            # Each push supersedes the previous one, nothing to replay
+            NotificationService._group_send(role_group(user_type), "stats_update", stats, replayable=False)
+
+    @staticmethod
+    def send_membership_update(user_ids):
+        # Open dashboards of these users re-check their role group membership
+        for user_id in user_ids:
+            NotificationService._group_send(user_group(user_id), "membership_update", {}, replayable=False)
 
     @staticmethod
     def send_user_notification(user_id, message, notification_type='info'):
-        channel_layer = get_channel_layer()
-        
-        async_to_sync(channel_layer.group_send)(
-            f"user_{user_id}",
+        NotificationService._group_send(
+            user_group(user_id),
+            "send_notification",
             {
-                "type": "send_notification",
-                "data": {
-                    'type': notification_type,
-                    'message': message,
-                    'timestamp': str(timezone.now())
-                }
+                'type': notification_type,
+                'message': message,
+                'timestamp': str(timezone.now())
             }
-        )
\ No newline at end of file
+        )
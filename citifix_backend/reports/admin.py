@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Report, ReportActionLog, MediaAttachment
+from .models import Report, ReportActionLog, MediaAttachment, MediaUploadSession, ReportDailyStat, ReportTombstone
 
 @admin.register(Report)
 class ReportAdmin(admin.ModelAdmin):
@@ -17,4 +17,22 @@ class ReportActionLogAdmin(admin.ModelAdmin):
 class MediaAttachmentAdmin(admin.ModelAdmin):
     list_display = ['report', 'file_type', 'file_size', 'uploaded_by', 'created_at']
     list_filter = ['file_type']
-    search_fields = ['report__title', 'uploaded_by__email']
\ No newline at end of file
+    search_fields = ['report__title', 'uploaded_by__email']
+
+@admin.register(MediaUploadSession)
+class MediaUploadSessionAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'report', 'file_type', 'received_size', 'total_size', 'uploaded_by', 'created_at']
+    list_filter = ['file_type']
+    search_fields = ['filename', 'report__title', 'uploaded_by__email']
+
+@admin.register(ReportDailyStat)
+class ReportDailyStatAdmin(admin.ModelAdmin):
+    list_display = ['day', 'status', 'severity', 'report_type', 'visibility', 'count']
+    list_filter = ['status', 'severity', 'report_type', 'visibility']
+    date_hierarchy = 'day'
+
+@admin.register(ReportTombstone)
+class ReportTombstoneAdmin(admin.ModelAdmin):
+    list_display = ['report_id', 'user_id', 'reason', 'removed_at']
+    list_filter = ['reason']
+    search_fields = ['report_id', 'user_id']
@@ -1,6 +1,23 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
 
 
 class IncidentsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "reports"
+
+    def ready(self):
+        from files.storage import file_releaser
+        from . import derivatives, etags, search, sync
+        from .models import MediaAttachment, Report
+
+        post_migrate.connect(search.create_search_index, sender=self)
+        post_save.connect(search.report_saved, sender=Report, dispatch_uid='report_search_saved')
+        post_delete.connect(search.report_deleted, sender=Report, dispatch_uid='report_search_deleted')
+        post_delete.connect(sync.report_deleted, sender=Report, dispatch_uid='report_sync_tombstone')
+        post_save.connect(derivatives.attachment_saved, sender=MediaAttachment, dispatch_uid='media_derivatives_saved')
+        post_delete.connect(derivatives.attachment_deleted, sender=MediaAttachment, dispatch_uid='media_derivatives_deleted')
+        post_delete.connect(file_releaser('file'), sender=MediaAttachment, weak=False, dispatch_uid='media_attachment_release_file')
+        # Attachments are part of the report payload, so they change its ETag
+        post_save.connect(etags.attachment_changed, sender=MediaAttachment, dispatch_uid='media_attachment_touch_report')
+        post_delete.connect(etags.attachment_changed, sender=MediaAttachment, dispatch_uid='media_attachment_deleted_touch_report')
@@ -0,0 +1,280 @@
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from files.access import protected_url
+from .etags import touch_report
+from .models import MediaAttachment
+from . import renderers
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'SYNCHRONOUS': False,
+    'WORKERS': 2,
+    'FFMPEG': 'ffmpeg',
+}
+
+# variant: (max width, max height, JPEG quality)
+VARIANTS = {
+    'image': {
+        'thumbnail': (320, 320, 75),
+        'web': (1280, 1280, 82),
+    },
+    'video': {
+        'poster': (1280, 1280, 82),
+        'thumbnail': (320, 320, 75),
+    },
+}
+
+
+def derivative_setting(name):
+    return getattr(settings, 'MEDIA_DERIVATIVES', {}).get(name, DEFAULTS[name])
+
+
+def derivative_name(attachment, variant, spec):
+    # Keyed by content and spec: identical uploads share one set of files,
+    # and changing a size invalidates the cached file
+    width, height, quality = spec
+    if attachment.checksum:
+        folder = f'derivatives/{attachment.checksum[:2]}/{attachment.checksum}'
+    else:
+        folder = f'reports/{attachment.report_id}/derivatives/{attachment.id}'
+    return f'{folder}/{variant}_{width}x{height}_q{quality}.jpg'
+
+
+def same_content(checksum, attachment_id):
+    """Other attachments with the same bytes, which share their derivative files."""
+    if not checksum:
+        return MediaAttachment.objects.none()
+    return MediaAttachment.objects.filter(checksum=checksum).exclude(id=attachment_id)
+
+
+def recorded_derivatives(queryset):
+    """Every derivative recorded by the attachments in ``queryset``, as {name: entry}."""
+    return {
+        entry['name']: entry
+        for derivatives in queryset.values_list('derivatives', flat=True)
+        for entry in (derivatives or {}).values()
+    }
+
+
+def missing_variants(attachment):
+    """Variants that have not been generated with the current spec yet, as {variant: (name, spec)}."""
+    done = attachment.derivatives or {}
+    missing = {}
+    for variant, spec in VARIANTS.get(attachment.file_type, {}).items():
+        name = derivative_name(attachment, variant, spec)
+        if done.get(variant, {}).get('name') != name:
+            missing[variant] = (name, spec)
+    return missing
+
+
+def derivative_urls(attachment, request=None):
+    if request is None:
+        return {}
+    return {
+        variant: protected_url(request, 'media_derivative', 'attachment', attachment.id, variant=variant)
+        for variant in (attachment.derivatives or {})
+    }
+
+
+class DerivativeGenerator:
+    """
+    Renders thumbnails, web sized images and video poster frames in a process
+    pool, so decoding large media never blocks a request or holds the GIL.
+
+    Generated variants are recorded in ``MediaAttachment.derivatives``, which
+    doubles as the cache: an attachment whose variants are all recorded with
+    the current spec is skipped, variants another attachment with the same
+    content has recorded are reused, and content that is already being
+    rendered is not submitted twice.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pid = None
+        self._executor = None
+        self._in_flight = {}
+        self.counters = {'submitted': 0, 'generated': 0, 'cached': 0, 'skipped': 0, 'failed': 0}
+
+    def schedule(self, attachment):
+        transaction.on_commit(lambda: self._submit_quietly(attachment))
+
+    def _submit_quietly(self, attachment):
+        # Runs after the upload committed, a rendering problem must not fail the request
+        try:
+            self.submit(attachment)
+        except Exception:
+            self._increment('failed')
+            logger.exception('Could not queue derivatives for %s', attachment.id)
+
+    def submit(self, attachment):
+        missing = missing_variants(attachment)
+        if not missing:
+            self._increment('cached')
+            return None
+        missing = self._reuse(attachment, missing)
+        if not missing:
+            return None
+
+        ffmpeg = derivative_setting('FFMPEG')
+        if attachment.file_type == 'video' and not shutil.which(ffmpeg):
+            self._increment('skipped')
+            logger.debug('ffmpeg not found, no poster frame for %s', attachment.id)
+            return None
+
+        names = {variant: name for variant, (name, _) in missing.items()}
+        targets = {
+            variant: (default_storage.path(name), spec[:2], spec[2])
+            for variant, (name, spec) in missing.items()
+        }
+        job = (attachment.file_type, attachment.file.path, targets, ffmpeg)
+
+        if derivative_setting('SYNCHRONOUS'):
+            try:
+                sizes = renderers.render(*job)
+            except Exception:
+                self._increment('failed')
+                logger.exception('Could not render derivatives for %s', attachment.id)
+                return None
+            self._store(attachment.id, attachment.checksum, names, sizes)
+            return None
+
+        # Attachments with the same content wait on the same job
+        key = attachment.checksum or attachment.id
+        with self._lock:
+            if key in self._in_flight:
+                future, waiting = self._in_flight[key]
+                if attachment.id not in waiting:
+                    waiting.append(attachment.id)
+                return future
+            try:
+                future = self._ensure_executor().submit(renderers.render, *job)
+            except BrokenProcessPool:
+                # A worker died (OOM on a huge image, for example), start a new pool
+                self._pid = None
+                future = self._ensure_executor().submit(renderers.render, *job)
+            self._in_flight[key] = (future, [attachment.id])
+            self.counters['submitted'] += 1
+        future.add_done_callback(partial(self._finished, key, attachment.checksum, names))
+        return future
+
+    def _reuse(self, attachment, missing):
+        """Record the variants another attachment with the same content has already rendered, return the rest."""
+        recorded = recorded_derivatives(same_content(attachment.checksum, attachment.id))
+        reused = {
+            variant: recorded[name]
+            for variant, (name, _) in missing.items()
+            if name in recorded and default_storage.exists(name)
+        }
+        if reused:
+            self._store(
+                attachment.id,
+                attachment.checksum,
+                {variant: entry['name'] for variant, entry in reused.items()},
+                {variant: (entry['width'], entry['height']) for variant, entry in reused.items()},
+                counter='cached',
+            )
+        return {variant: target for variant, target in missing.items() if variant not in reused}
+
+    def join(self, timeout=None):
+        """Block until every submitted job has finished and been recorded."""
+        with self._idle:
+            self._idle.wait_for(lambda: not self._in_flight, timeout=timeout)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats['pending'] = len(self._in_flight)
+        return stats
+
+    def _ensure_executor(self):
+        # Spawned workers only import reports.renderers, and a forked web
+        # worker gets a pool of its own
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._in_flight = {}
+            self._executor = ProcessPoolExecutor(
+                max_workers=derivative_setting('WORKERS'),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return self._executor
+
+    def _finished(self, key, checksum, names, future):
+        try:
+            sizes = future.result()
+        except Exception:
+            sizes = None
+            self._increment('failed')
+            logger.exception('Could not render derivatives for %s', key)
+
+        stored = 0
+        while True:
+            with self._idle:
+                waiting = self._in_flight[key][1][stored:]
+                if not waiting or sizes is None:
+                    self._in_flight.pop(key, None)
+                    self._idle.notify_all()
+                    return
+            for attachment_id in waiting:
+                try:
+                    self._store(attachment_id, checksum, names, sizes)
+                except Exception:
+                    self._increment('failed')
+                    logger.exception('Could not record derivatives for %s', attachment_id)
+                finally:
+                    close_old_connections()
+            stored += len(waiting)
+
+    def _store(self, attachment_id, checksum, names, sizes, counter='generated'):
+        with transaction.atomic():
+            attachment = MediaAttachment.objects.select_for_update().filter(id=attachment_id).first()
+            if attachment is None:
+                # Deleted while rendering; the files stay for any attachment with the same content
+                if not same_content(checksum, attachment_id).exists():
+                    for name in names.values():
+                        default_storage.delete(name)
+                return
+
+            derivatives = dict(attachment.derivatives or {})
+            shared = None
+            for variant, (width, height) in sizes.items():
+                previous = derivatives.get(variant, {}).get('name')
+                if previous and previous != names[variant]:
+                    if shared is None:
+                        shared = recorded_derivatives(same_content(checksum, attachment_id))
+                    if previous not in shared:
+                        default_storage.delete(previous)
+                derivatives[variant] = {'name': names[variant], 'width': width, 'height': height}
+            MediaAttachment.objects.filter(id=attachment_id).update(derivatives=derivatives)
+            touch_report(attachment.report_id)
+        self._increment(counter)
+
+    def _increment(self, counter):
+        with self._lock:
+            self.counters[counter] += 1
+
+
+generator = DerivativeGenerator()
+
+
+def attachment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.file:
+        generator.schedule(instance)
+
+
+def attachment_deleted(sender, instance, **kwargs):
+    # Files another attachment with the same content still records stay
+    shared = recorded_derivatives(same_content(instance.checksum, instance.id))
+    for entry in (instance.derivatives or {}).values():
+        if entry['name'] not in shared:
+            default_storage.delete(entry['name'])
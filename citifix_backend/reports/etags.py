@@ -0,0 +1,91 @@
+import hashlib
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from config.caches import is_shared_cache
+from files.access import link_expiry
+from .models import Report
+from .response_cache import response_cache
+
+
+def _etag(request, *validators):
+    # Besides the rows, the body depends on who asks (media links are signed
+    # per user and per link window) and on the query string
+    key = [str(request.user.pk), link_expiry(), request.get_full_path(), *validators]
+    return quote_etag(hashlib.md5(repr(key).encode(), usedforsecurity=False).hexdigest())
+
+
+def list_validators(request, queryset, paginator):
+    """
+    What a list page depends on, without aggregating the whole list: the
+    (id, updated_at) keys of the page's rows, read with the page's own LIMIT,
+    and, when the body carries the total count, the generation of the user's
+    slice, which report_changed() bumps. A per-process cache can't be trusted
+    with that, so the row count is used instead. None when the page can't be
+    found without counting.
+    """
+    version = None
+    if paginator.is_counted(request):
+        if is_shared_cache():
+            # Read before the rows, so a change in between shows up on the next poll
+            version = response_cache.generation('public' if request.user.user_type == 'media_house' else 'all')
+        else:
+            version = queryset.order_by().count()
+    rows = paginator.page_rows(queryset.prefetch_related(None), request)
+    if rows is None:
+        return None
+    return list(rows.values_list('id', 'updated_at')), version
+
+
+def list_etag(request, validators):
+    """ETag of a list response, from its list_validators()."""
+    if validators is None:
+        return None
+    return _etag(request, 'list', validators)
+
+
+def detail_etag(request, queryset, pk):
+    """ETag of a single report, or None when it is not visible (the normal path answers 404)."""
+    try:
+        updated_at = queryset.prefetch_related(None).filter(pk=pk).values_list('updated_at', flat=True).first()
+    except (ValidationError, ValueError):
+        return None
+    if updated_at is None:
+        return None
+    return _etag(request, 'detail', pk, updated_at)
+
+
+def not_modified(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header or etag is None:
+        return False
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    etags = {value.removeprefix('W/') for value in parse_etags(header)}
+    return etag in etags or '*' in etags
+
+
+def not_modified_response(etag):
+    return tag_response(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+
+def tag_response(response, etag):
+    if etag is not None:
+        response['ETag'] = etag
+        # Clients keep the body but must revalidate, shared caches must not keep it
+        response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def touch_report(report_id):
+    """Bump updated_at for changes to related rows that show up in the report's payload."""
+    Report.objects.filter(pk=report_id).update(updated_at=timezone.now())
+
+
+def attachment_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch_report(instance.report_id)
+        # Cached list pages show the attachment count
+        visibility = Report.objects.filter(pk=instance.report_id).values_list('visibility', flat=True).first()
+        response_cache.report_changed(visibility)
@@ -0,0 +1,147 @@
+import math
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_KM = 6371.0088
+
+# Upper bound on the number of geohash cells a single query may expand to.
+# Coarser cells are picked until the bounding box fits in this many.
+MAX_QUERY_CELLS = 24
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    latitude = float(latitude)
+    longitude = float(longitude)
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lng_range[0] = mid
+            else:
+                bits = bits << 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits = bits << 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(chars)
+
+
+def _cell_size(precision):
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = math.floor(precision * 5 / 2)
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def covering_cells(min_lat, min_lng, max_lat, max_lng):
+    """Geohash prefixes whose cells together cover the given bounding box."""
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        cell_height, cell_width = _cell_size(precision)
+        lat_start = math.floor((min_lat + 90) / cell_height)
+        lat_end = math.floor((min(max_lat, 89.999999) + 90) / cell_height)
+        lng_start = math.floor((min_lng + 180) / cell_width)
+        lng_end = math.floor((min(max_lng, 179.999999) + 180) / cell_width)
+
+        if (lat_end - lat_start + 1) * (lng_end - lng_start + 1) > MAX_QUERY_CELLS:
+            continue
+
+        cells = set()
+        for lat_index in range(lat_start, lat_end + 1):
+            for lng_index in range(lng_start, lng_end + 1):
+                cells.add(encode_geohash(
+                    (lat_index + 0.5) * cell_height - 90,
+                    (lng_index + 0.5) * cell_width - 180,
+                    precision,
+                ))
+        return sorted(cells)
+
+    return ['']
+
+
+def geohash_cells_q(min_lat, min_lng, max_lat, max_lng):
+    # Each prefix becomes a range condition so the geohash index is used for
+    # a range scan on every backend (LIKE 'prefix%' is not index friendly on SQLite).
+    query = Q()
+    for prefix in covering_cells(min_lat, min_lng, max_lat, max_lng):
+        if not prefix:
+            return Q()
+        query |= Q(geohash__gte=prefix, geohash__lt=prefix + '~')
+    return query
+
+
+def bbox_q(min_lat, min_lng, max_lat, max_lng):
+    return geohash_cells_q(min_lat, min_lng, max_lat, max_lng) & Q(
+        latitude__gte=min_lat, latitude__lte=max_lat,
+        longitude__gte=min_lng, longitude__lte=max_lng,
+    )
+
+
+def radius_bboxes(latitude, longitude, radius_km):
+    """Bounding boxes covering the circle, split in two when it crosses the antimeridian."""
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(latitude))
+    if cos_lat < 1e-6:
+        lng_delta = 180.0
+    else:
+        lng_delta = min(180.0, lat_delta / cos_lat)
+    min_lat = max(-90.0, latitude - lat_delta)
+    max_lat = min(90.0, latitude + lat_delta)
+    min_lng = longitude - lng_delta
+    max_lng = longitude + lng_delta
+
+    if lng_delta >= 180.0:
+        return [(min_lat, -180.0, max_lat, 180.0)]
+    if min_lng < -180.0:
+        return [
+            (min_lat, -180.0, max_lat, max_lng),
+            (min_lat, min_lng + 360.0, max_lat, 180.0),
+        ]
+    if max_lng > 180.0:
+        return [
+            (min_lat, min_lng, max_lat, 180.0),
+            (min_lat, -180.0, max_lat, max_lng - 360.0),
+        ]
+    return [(min_lat, min_lng, max_lat, max_lng)]
+
+
+def radius_q(latitude, longitude, radius_km):
+    query = Q()
+    for box in radius_bboxes(latitude, longitude, radius_km):
+        query |= bbox_q(*box)
+    return query
+
+
+def distance_km_expression(latitude, longitude):
+    # Haversine distance to the given point, usable in annotate()/filter()
+    lat = Radians(Cast(F('latitude'), FloatField()))
+    lng = Radians(Cast(F('longitude'), FloatField()))
+    origin_lat = math.radians(latitude)
+    origin_lng = math.radians(longitude)
+
+    a = (
+        Power(Sin((lat - origin_lat) / 2), 2)
+        + math.cos(origin_lat) * Cos(lat) * Power(Sin((lng - origin_lng) / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(a))
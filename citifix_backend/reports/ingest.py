@@ -0,0 +1,63 @@
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from notifications.dispatch import dispatcher
+from notifications.services import NotificationService
+from .models import Report, ReportActionLog
+from .response_cache import response_cache
+from .search import index_reports
+from .serializers import CreateReportSerializer
+from .timeline import action_summary
+from . import stats
+
+BULK_CREATE_BATCH_SIZE = 500
+
+
+def create_reports(items, reporter):
+    """
+    Validate every item with CreateReportSerializer and insert the valid
+    ones, with their initial action logs, using bulk_create. Returns one
+    result per item in order and the created reports.
+
+    bulk_create sends no signals, so the geohash, search index, stats,
+    cached list pages and new report notification (one for the whole batch) are handled here.
+    """
+    results = []
+    reports = []
+    # One serializer for the whole batch, building its fields costs more than validating an item
+    serializer = CreateReportSerializer()
+    for index, item in enumerate(items):
+        try:
+            validated_data = serializer.run_validation(item)
+        except ValidationError as exc:
+            results.append({'index': index, 'success': False, 'errors': exc.detail})
+            continue
+        report = Report(reporter=reporter, **validated_data)
+        report.update_geohash()
+        reports.append(report)
+        results.append({'index': index, 'success': True, 'id': str(report.id)})
+
+    if not reports:
+        return results, reports
+
+    logs = [
+        ReportActionLog(
+            report=report,
+            actor=reporter,
+            action_type='status_change',
+            description=f'Report created with status: {report.status}',
+        )
+        for report in reports
+    ]
+    for report, log in zip(reports, logs):
+        report.action_log_count = 1
+        report.latest_action = action_summary(log)
+
+    with transaction.atomic():
+        Report.objects.bulk_create(reports, batch_size=BULK_CREATE_BATCH_SIZE)
+        ReportActionLog.objects.bulk_create(logs, batch_size=BULK_CREATE_BATCH_SIZE)
+        index_reports(reports)
+        stats.record_created_many(reports)
+        response_cache.report_changed(*{report.visibility for report in reports})
+        dispatcher.dispatch_on_commit(NotificationService.send_new_reports_notification, reports)
+
+    return results, reports
@@ -0,0 +1,72 @@
+import random
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+from reports.models import Report
+from reports.views import ReportViewSet
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Measure report ingestion throughput through POST /reports/bulk/ and, for comparison, POST /reports/'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='*', default=[1, 100, 1000])
+        parser.add_argument('--skip-single', action='store_true', help='Only measure the bulk endpoint')
+
+    def handle(self, *args, **options):
+        if any(size < 1 for size in options['sizes']):
+            raise CommandError('Batch sizes must be positive')
+
+        for size in options['sizes']:
+            self.measure('bulk', size, self.create_in_bulk)
+            if not options['skip_single']:
+                self.measure('single', size, self.create_one_by_one)
+
+    def measure(self, label, size, run):
+        items = [self.payload(index) for index in range(size)]
+        with transaction.atomic():
+            user = User.objects.create_user(email='ingest-benchmark@example.com', password=None, user_type='authority', status='active')
+            reset_queries()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                run(user, items)
+                elapsed = time.perf_counter() - started
+
+            if Report.objects.filter(reporter=user).count() != size:
+                raise CommandError(f'{label}: not every report was created')
+            self.stdout.write(
+                f'{label:<7} {size:>5} reports  {elapsed * 1000:9.1f} ms  {size / elapsed:8.0f} reports/s  {len(queries):6} queries'
+            )
+            transaction.set_rollback(True)
+
+    def payload(self, index):
+        return {
+            'report_type': random.choice(Report.REPORT_TYPES)[0],
+            'severity': random.choice(Report.SEVERITY_LEVELS)[0],
+            'title': f'Partner incident {index}',
+            'description': 'Incident pushed by a partner dispatch system',
+            'latitude': f'{random.uniform(4.5, 11):.6f}',
+            'longitude': f'{random.uniform(-3, 1):.6f}',
+            'address': 'Accra',
+            'visibility': 'public',
+        }
+
+    def create_in_bulk(self, user, items):
+        request = APIRequestFactory().post('/api/v1/reports/bulk/', {'reports': items}, format='json')
+        force_authenticate(request, user=user)
+        response = ReportViewSet.as_view({'post': 'bulk'})(request)
+        if response.status_code != 201:
+            raise CommandError(f'Bulk create failed: {response.data}')
+
+    def create_one_by_one(self, user, items):
+        factory = APIRequestFactory()
+        view = ReportViewSet.as_view({'post': 'create'})
+        for item in items:
+            request = factory.post('/api/v1/reports/', item, format='json')
+            force_authenticate(request, user=user)
+            response = view(request)
+            if response.status_code != 201:
+                raise CommandError(f'Create failed: {response.data}')
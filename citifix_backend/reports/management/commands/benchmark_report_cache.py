@@ -0,0 +1,95 @@
+import random
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from config.caches import is_shared_cache
+from reports.models import Report
+from reports.response_cache import response_cache
+from reports.views import ReportViewSet
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Measure media-house report list requests answered from the shared response cache against uncached ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reports', type=int, default=5000)
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--pages', type=int, default=3)
+        parser.add_argument('--page-size', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if options['reports'] < 1 or options['users'] < 1 or options['pages'] < 1:
+            raise CommandError('--reports, --users and --pages must be positive')
+        if not is_shared_cache():
+            raise CommandError('The response cache is disabled with a per-process cache, set CACHE_BACKEND to "database" or "redis"')
+
+        with transaction.atomic():
+            users = [
+                User.objects.create_user(email=f'cache-benchmark-{index}@example.com', password=None, user_type='media_house', status='active')
+                for index in range(options['users'])
+            ]
+            self.seed(users[0], options['reports'])
+            view = ReportViewSet.as_view({'get': 'list'})
+            params = [
+                {'page_size': options['page_size'], 'severity': severity}
+                for severity in ('', 'high', 'critical')[:options['pages']]
+            ]
+
+            response_cache.clear()
+            uncached = self.measure(view, users, params, clear=True)
+            response_cache.clear()
+            before = response_cache.get_stats()
+            cached = self.measure(view, users, params, clear=False)
+            after = response_cache.get_stats()
+
+            for label, (cpu, queries) in (('uncached', uncached), ('shared cache', cached)):
+                self.stdout.write(f'{label:<13} {cpu * 1000:7.2f} ms CPU/request  {queries:5.2f} queries/request')
+            self.stdout.write(
+                f'hits {after["hits"] - before["hits"]}  misses {after["misses"] - before["misses"]}  '
+                f'entries {after["entries"]}  bytes {after["bytes"]}'
+            )
+            transaction.set_rollback(True)
+
+    def seed(self, reporter, count):
+        reports = []
+        for index in range(count):
+            report = Report(
+                reporter=reporter,
+                report_type=random.choice(Report.REPORT_TYPES)[0],
+                severity=random.choice(Report.SEVERITY_LEVELS)[0],
+                title=f'Cache benchmark report {index}',
+                description='Synthetic report for the response cache benchmark',
+                latitude=round(random.uniform(4.5, 11), 6),
+                longitude=round(random.uniform(-3, 1), 6),
+                address='Accra',
+                visibility='public',
+            )
+            report.update_geohash()
+            reports.append(report)
+        Report.objects.bulk_create(reports, batch_size=1000)
+
+    def measure(self, view, users, params, clear):
+        factory = APIRequestFactory(SERVER_NAME='localhost')
+        requests = 0
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.process_time()
+            for user in users:
+                for query in params:
+                    if clear:
+                        response_cache.clear()
+                    request = factory.get('/api/v1/reports/', {key: value for key, value in query.items() if value})
+                    force_authenticate(request, user=user)
+                    response = view(request)
+                    # Cache hits are plain, already rendered responses
+                    if isinstance(response, Response):
+                        response.render()
+                    if response.status_code != 200:
+                        raise CommandError(f'Expected 200, got {response.status_code}')
+                    requests += 1
+            elapsed = time.process_time() - started
+        return elapsed / requests, len(queries) / requests
@@ -0,0 +1,82 @@
+import random
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from reports.models import Report
+from reports.response_cache import response_cache
+from reports.views import ReportViewSet
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Measure the CPU time of dashboard polls on an unchanged dataset, with and without If-None-Match'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reports', type=int, default=5000)
+        parser.add_argument('--polls', type=int, default=200)
+        parser.add_argument('--page-size', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if options['reports'] < 1 or options['polls'] < 1:
+            raise CommandError('--reports and --polls must be positive')
+
+        with transaction.atomic():
+            admin = User.objects.create_superuser(email='polling-benchmark@example.com', password=None)
+            self.seed(admin, options['reports'])
+            report_id = Report.objects.values_list('id', flat=True).first()
+
+            shapes = (
+                ('list', {'get': 'list'}, {}, {'page_size': options['page_size']}),
+                ('list ?severity=high', {'get': 'list'}, {}, {'severity': 'high', 'page_size': options['page_size']}),
+                ('detail', {'get': 'retrieve'}, {'pk': report_id}, {}),
+            )
+            for label, actions, kwargs, params in shapes:
+                view = ReportViewSet.as_view(actions)
+                first = self.poll(view, admin, kwargs, params)
+                etag = first['ETag']
+
+                full = self.measure(view, admin, kwargs, params, options['polls'], 200)
+                conditional = self.measure(view, admin, kwargs, params, options['polls'], 304, etag)
+                self.stdout.write(
+                    f'{label:<22} 200: {full * 1000:7.2f} ms CPU/poll   '
+                    f'304: {conditional * 1000:7.2f} ms CPU/poll   ({(1 - conditional / full) * 100:4.1f}% less)'
+                )
+            transaction.set_rollback(True)
+
+    def seed(self, reporter, count):
+        reports = []
+        for index in range(count):
+            report = Report(
+                reporter=reporter,
+                report_type=random.choice(Report.REPORT_TYPES)[0],
+                severity=random.choice(Report.SEVERITY_LEVELS)[0],
+                title=f'Polling benchmark report {index}',
+                description='Synthetic report for the polling benchmark',
+                latitude=round(random.uniform(4.5, 11), 6),
+                longitude=round(random.uniform(-3, 1), 6),
+                address='Accra',
+            )
+            report.update_geohash()
+            reports.append(report)
+        Report.objects.bulk_create(reports, batch_size=1000)
+
+    def poll(self, view, user, kwargs, params, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        request = APIRequestFactory(SERVER_NAME='localhost').get('/api/v1/reports/', params, **headers)
+        force_authenticate(request, user=user)
+        # Measure the database path, not the shared admin page cache
+        response_cache.clear()
+        response = view(request, **kwargs)
+        if isinstance(response, Response):
+            response.render()
+        return response
+
+    def measure(self, view, user, kwargs, params, polls, expected_status, etag=None):
+        started = time.process_time()
+        for _ in range(polls):
+            response = self.poll(view, user, kwargs, params, etag)
+            if response.status_code != expected_status:
+                raise CommandError(f'Expected {expected_status}, got {response.status_code}')
+        return (time.process_time() - started) / polls
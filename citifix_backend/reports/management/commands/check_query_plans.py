@@ -0,0 +1,211 @@
+import random
+import re
+import uuid
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from reports import etags, stats
+from reports.models import Report
+from reports.sync import changed_reports, removed_reports
+from reports.views import ReportViewSet
+from users.models import User
+
+ROLES = ('superadmin', 'authority', 'media_house', 'citizen')
+
+FILTERS = (
+    {},
+    {'status': 'reported'},
+    {'severity': 'high'},
+    {'report_type': 'fire'},
+    {'search': 'fire'},
+    {'near': '5.6037,-0.1870', 'radius_km': '5'},
+    {'bbox': '-0.3,5.5,-0.1,5.7'},
+)
+
+# Plan lines that mean the whole table is read
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (\w+)(?!.*\b(?:USING (?:COVERING )?INDEX|VIRTUAL TABLE)\b)'),
+    'postgresql': re.compile(r'\bSeq Scan on (\w+)'),
+}
+
+# Plan lines that walk a whole index in order. With LIMIT this stops after a
+# page worth of rows, which is what an unfiltered "newest first" listing wants,
+# so these are only reported as failures with --strict.
+INDEX_WALK_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (\w+) USING (?:COVERING )?INDEX'),
+    'postgresql': re.compile(r'\bIndex (?:Only )?Scan (?:Backward )?using \w+ on (\w+)(?![^\n]*\n\s+Index Cond)'),
+}
+
+# Counts and statistics read every row their filter matches, so a scan is the
+# right plan when that is a large share of the table (or a small summary
+# table). Scans in these queries are warnings unless --strict is given.
+AGGREGATE_QUERY = re.compile(r'^\s*SELECT\s+(?:COUNT|SUM|MAX|MIN|AVG)\(|\bGROUP BY\b', re.IGNORECASE)
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN every ReportViewSet query shape (pages, counts, ETag validators '
+        'and statistics) for every role and fail if any of them scans a whole table'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Insert this many synthetic reports first (rolled back afterwards)')
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--strict', action='store_true', help='Also fail on full index walks and aggregate scans')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the full plan of every query')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor not in FULL_SCAN_PATTERNS:
+            raise CommandError(f'Query plan checks are not supported on {connection.vendor}')
+        scan_pattern = FULL_SCAN_PATTERNS[connection.vendor]
+        walk_pattern = INDEX_WALK_PATTERNS[connection.vendor]
+
+        with transaction.atomic(using=options['database']):
+            users = self.get_users(options['seed'])
+            if options['seed']:
+                self.seed(options['seed'], users)
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+
+            failures = []
+            for name, shape in self.query_shapes(users, options['page_size']):
+                plans = self.explain(connection, shape)
+                plan = '\n'.join(text for text, _ in plans)
+                scans = self.tables(scan_pattern, [text for text, aggregate in plans if not aggregate])
+                aggregate_scans = self.tables(scan_pattern, [text for text, aggregate in plans if aggregate])
+                walks = self.tables(walk_pattern, [plan])
+                if scans:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f'FULL SCAN  {name}  ({", ".join(scans)})'))
+                elif aggregate_scans and options['strict']:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f'AGG SCAN   {name}  ({", ".join(aggregate_scans)})'))
+                elif walks and options['strict']:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f'WALK       {name}  ({", ".join(walks)})'))
+                elif aggregate_scans:
+                    self.stdout.write(self.style.WARNING(f'agg scan   {name}  ({", ".join(aggregate_scans)})'))
+                elif walks:
+                    self.stdout.write(self.style.WARNING(f'walk       {name}  ({", ".join(walks)})'))
+                else:
+                    self.stdout.write(f'ok         {name}')
+                if options['verbose_plans'] or scans or aggregate_scans:
+                    self.stdout.write('    ' + plan.replace('\n', '\n    '))
+
+            transaction.set_rollback(True, using=options['database'])
+
+        if failures:
+            raise CommandError(f'{len(failures)} query shape(s) do a full table scan')
+        self.stdout.write(self.style.SUCCESS('No full table scans found'))
+
+    def get_users(self, seed):
+        users = {}
+        for role in ROLES:
+            user = User.objects.filter(user_type=role, status='active').first()
+            if user is None and seed:
+                user = User.objects.create_user(
+                    email=f'plan-check-{role}@example.com',
+                    password=None,
+                    user_type=role,
+                    status='active',
+                )
+            # The querysets only need the user's id and type
+            users[role] = user or User(id=uuid.uuid4(), user_type=role, status='active')
+        return users
+
+    def tables(self, pattern, plans):
+        return sorted({match.group(1) for plan in plans for match in pattern.finditer(plan)})
+
+    def explain(self, connection, shape):
+        """(plan, is_aggregate) for every query of a shape."""
+        if isinstance(shape, QuerySet):
+            return [(shape.explain(), False)]
+        # Aggregates and other code paths: run them and EXPLAIN what they sent
+        queries = []
+
+        def record(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith('SELECT'):
+                queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            shape()
+        plans = []
+        with connection.cursor() as cursor:
+            for sql, params in queries:
+                cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+                text = '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+                plans.append((text, bool(AGGREGATE_QUERY.search(sql))))
+        return plans
+
+    def seed(self, count, users):
+        # Saved one by one so the search index is filled like it is in production
+        reporters = [users['citizen']]
+        assignees = [users['authority'], None]
+
+        for index in range(count):
+            report = Report(
+                reporter=random.choice(reporters),
+                assigned_to=random.choice(assignees),
+                report_type=random.choice(Report.REPORT_TYPES)[0],
+                severity=random.choice(Report.SEVERITY_LEVELS)[0],
+                status=random.choice(Report.STATUS_CHOICES)[0],
+                visibility=random.choice(Report.VISIBILITY_CHOICES)[0],
+                title=f'Seeded report {index}',
+                description='Synthetic report used for query plan checks',
+                latitude=round(random.uniform(4.5, 11), 6),
+                longitude=round(random.uniform(-3, 1), 6),
+                address='Seeded',
+            )
+            report.save()
+        stats.rebuild()
+
+    def query_shapes(self, users, page_size):
+        factory = APIRequestFactory()
+
+        for role, user in users.items():
+            actions = ['list']
+            if role == 'citizen':
+                actions.append('my_reports')
+            if role == 'authority':
+                actions.append('assigned_to_me')
+
+            for action in actions:
+                for params in FILTERS:
+                    request = Request(factory.get('/api/v1/reports/', params))
+                    request.user = user
+
+                    view = ReportViewSet(request=request, action=action, format_kwarg=None, kwargs={})
+                    queryset = view.get_queryset()
+                    if action == 'my_reports':
+                        queryset = queryset.filter(reporter=user)
+                    elif action == 'assigned_to_me':
+                        queryset = queryset.filter(assigned_to=user)
+
+                    label = ' '.join(f'{key}={value}' for key, value in params.items()) or 'no filters'
+                    yield f'{role:<12} {action:<15} {label}', queryset[:page_size]
+                    # Page number pages count the list, so does the ETag without a shared cache
+                    yield f'{role:<12} {action:<15} {label} (count)', lambda queryset=queryset: queryset.order_by().count()
+                    yield f'{role:<12} {action:<15} {label} (etag)', (
+                        lambda request=request, queryset=queryset, view=view: etags.list_validators(request, queryset, view.paginator)
+                    )
+
+                if action != 'list':
+                    # Delta sync from a token an hour old
+                    request = Request(factory.get('/api/v1/reports/'))
+                    request.user = user
+                    view = ReportViewSet(request=request, action=action, format_kwarg=None, kwargs={})
+                    queryset = view.get_queryset().filter(**{'reporter' if action == 'my_reports' else 'assigned_to': user})
+                    position = (timezone.now() - timedelta(hours=1), uuid.uuid4())
+                    yield f'{role:<12} {action:<15} since=token', changed_reports(queryset, position)[:page_size]
+                    yield f'{role:<12} {action:<15} since=token (deleted)', removed_reports(user, position)[:page_size]
+
+            if role != 'citizen':
+                visibility = 'public' if role == 'media_house' else None
+                yield f'{role:<12} {"stats":<15} days=30', lambda visibility=visibility: stats.snapshot(visibility=visibility)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from reports.derivatives import VARIANTS, generator
+from reports.models import MediaAttachment
+
+
+class Command(BaseCommand):
+    help = 'Render missing thumbnails, web images and poster frames for existing media attachments'
+
+    def handle(self, *args, **options):
+        attachments = MediaAttachment.objects.filter(file_type__in=list(VARIANTS)).iterator(chunk_size=500)
+        for attachment in attachments:
+            generator.submit(attachment)
+        generator.join()
+
+        stats = generator.get_stats()
+        self.stdout.write(
+            f"{stats['generated']} rendered, {stats['cached']} already up to date, "
+            f"{stats['skipped']} skipped, {stats['failed']} failed"
+        )
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from reports.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Delete report tombstones older than the delta sync retention window'
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} report tombstones'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from reports.timeline import rebuild_action_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute the action log count and latest action of every report from the action log'
+
+    def handle(self, *args, **options):
+        rebuild_action_summaries()
+        self.stdout.write(self.style.SUCCESS('Report action summaries rebuilt'))
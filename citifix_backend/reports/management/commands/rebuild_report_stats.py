@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from reports.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the report statistics aggregates from the reports table'
+
+    def handle(self, *args, **options):
+        rebuild()
+        self.stdout.write(self.style.SUCCESS('Report statistics rebuilt'))
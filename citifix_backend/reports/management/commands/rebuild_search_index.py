@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from reports.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for reports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        rebuild_search_index(using=options['database'])
+        self.stdout.write(self.style.SUCCESS('Report search index rebuilt'))
@@ -1,6 +1,10 @@
+import os
 import uuid
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
+from files.storage import content_addressed_storage
+from .geo import encode_geohash
 
 class Report(models.Model):
     REPORT_TYPES = (
@@ -32,6 +36,8 @@ class Report(models.Model):
         ('authorities_only', 'Authorities Only'),
     )
 
+    ACTION_SUMMARY_FIELDS = ('action_log_count', 'latest_action')
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     reporter = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reports')
     report_type = models.CharField(max_length=50, choices=REPORT_TYPES)
@@ -41,6 +47,7 @@ class Report(models.Model):
     latitude = models.DecimalField(max_digits=9, decimal_places=6)
     longitude = models.DecimalField(max_digits=9, decimal_places=6)
     address = models.TextField()
+    geohash = models.CharField(max_length=12, blank=True, editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='reported')
     visibility = models.CharField(max_length=20, choices=VISIBILITY_CHOICES, default='public')
     
@@ -48,15 +55,54 @@ class Report(models.Model):
     assigned_at = models.DateTimeField(null=True, blank=True)
     resolved_at = models.DateTimeField(null=True, blank=True)
     
+    # Summary of the append-only action log, the full history is served by the timeline endpoint
+    action_log_count = models.PositiveIntegerField(default=0, editable=False)
+    latest_action = models.JSONField(null=True, blank=True, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['geohash', 'latitude', 'longitude'], name='report_geohash_idx'),
+            models.Index(fields=['created_at', 'id'], name='report_created_id_idx'),
+            # Role visibility: media houses (visibility), citizens (reporter),
+            # authorities (visibility OR assigned_to), newest first
+            models.Index(fields=['visibility', '-created_at'], name='report_visibility_idx'),
+            models.Index(fields=['visibility', 'status', '-created_at'], name='report_vis_status_idx'),
+            models.Index(fields=['reporter', '-created_at'], name='report_reporter_idx'),
+            models.Index(fields=['assigned_to', '-created_at'], name='report_assigned_idx'),
+            # Delta sync of my_reports / assigned_to_me: (updated_at, id) > token
+            models.Index(fields=['reporter', 'updated_at', 'id'], name='report_reporter_sync_idx'),
+            models.Index(fields=['assigned_to', 'updated_at', 'id'], name='report_assigned_sync_idx'),
+            # Dashboard filters
+            models.Index(fields=['status', '-created_at'], name='report_status_idx'),
+            models.Index(fields=['severity', '-created_at'], name='report_severity_idx'),
+            models.Index(fields=['report_type', '-created_at'], name='report_type_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.status}"
 
+    def update_geohash(self):
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+
+    def save(self, *args, **kwargs):
+        self.update_geohash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        elif update_fields is None and not self._state.adding:
+            # The action log summary is only written by reports.timeline, so a
+            # save of a stale instance can't undo a concurrent log entry
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.ACTION_SUMMARY_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
 class ReportActionLog(models.Model):
     ACTION_TYPES = (
         ('status_change', 'Status Changed'),
@@ -70,10 +116,15 @@ class ReportActionLog(models.Model):
     actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     action_type = models.CharField(max_length=50, choices=ACTION_TYPES)
     description = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set on creation like auto_now_add, but known before the row is saved
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Timeline pages: WHERE report_id = ? AND (timestamp, id) < cursor
+            models.Index(fields=['report', '-timestamp', '-id'], name='action_log_timeline_idx'),
+        ]
 
     def __str__(self):
         return f"{self.action_type} - {self.report.title}"
@@ -90,12 +141,88 @@ class MediaAttachment(models.Model):
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     report = models.ForeignKey(Report, on_delete=models.CASCADE, related_name='media_attachments')
-    file = models.FileField(upload_to=report_media_upload_path)
+    file = models.FileField(upload_to=report_media_upload_path, storage=content_addressed_storage)
     file_type = models.CharField(max_length=20, choices=FILE_TYPES)
-    file_size = models.IntegerField()
+    file_size = models.BigIntegerField()
+    checksum = models.CharField(max_length=64, blank=True, db_index=True)
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)
+    uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    is_public = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.file_type} - {self.report.title}"
+
+
+class MediaUploadSession(models.Model):
+    """A resumable upload that is assembled on disk one chunk at a time."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    report = models.ForeignKey(Report, on_delete=models.CASCADE, related_name='upload_sessions')
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    file_type = models.CharField(max_length=20, choices=MediaAttachment.FILE_TYPES)
     is_public = models.BooleanField(default=True)
+    total_size = models.BigIntegerField()
+    received_size = models.BigIntegerField(default=0)
+    checksum = models.CharField(max_length=64, blank=True)
+    attachment = models.OneToOneField(MediaAttachment, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_session')
+    # Set while a request is writing the chunk at received_size
+    writing_since = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received_size}/{self.total_size})"
+
+    @property
+    def is_complete(self):
+        return self.attachment_id is not None
+
+    @property
+    def partial_path(self):
+        return os.path.join(settings.MEDIA_ROOT, 'uploads', 'partial', f'{self.id}.part')
+
+class ReportDailyStat(models.Model):
+    """Report counts per creation day and status/severity/type/visibility bucket."""
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Report.STATUS_CHOICES)
+    severity = models.CharField(max_length=20, choices=Report.SEVERITY_LEVELS)
+    report_type = models.CharField(max_length=50, choices=Report.REPORT_TYPES)
+    visibility = models.CharField(max_length=20, choices=Report.VISIBILITY_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'status', 'severity', 'report_type', 'visibility'],
+                name='unique_report_stat_bucket',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.status}/{self.severity}/{self.report_type}: {self.count}"
+
+class ReportTombstone(models.Model):
+    """A report that left a user's my_reports or assigned_to_me list, for delta sync clients."""
+    REASONS = (
+        ('deleted', 'Deleted'),
+        ('unassigned', 'Unassigned'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Plain ids, the report is gone and the user may be deleted in the same cascade
+    report_id = models.UUIDField()
+    user_id = models.UUIDField()
+    reason = models.CharField(max_length=20, choices=REASONS)
+    removed_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        ordering = ['-removed_at']
+        indexes = [
+            models.Index(fields=['user_id', 'removed_at', 'id'], name='report_tombstone_sync_idx'),
+            models.Index(fields=['removed_at'], name='report_tombstone_removed_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.file_type} - {self.report.title}"
\ No newline at end of file
+        return f"{self.report_id} {self.reason} for {self.user_id}"
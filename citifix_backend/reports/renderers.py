@@ -0,0 +1,74 @@
+"""
+Image rendering used by the derivative process pool.
+
+This module must not import Django: it is loaded by freshly spawned worker
+processes that only get file paths in and return plain values.
+"""
+import os
+import subprocess
+import tempfile
+from PIL import Image, ImageOps
+
+POSTER_OFFSETS = ('1', '0')
+
+
+def _save_jpeg(image, destination, quality):
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    temporary = f'{destination}.{os.getpid()}.tmp'
+    image.save(temporary, 'JPEG', quality=quality, optimize=True, progressive=True)
+    os.replace(temporary, destination)
+
+
+def render_image(source, targets):
+    """
+    Write a downscaled JPEG for every ``{variant: (destination, (width, height), quality)}``
+    target and return ``{variant: [width, height]}``.
+
+    The source is decoded once, at the smallest JPEG scale that still covers
+    the largest target, and each smaller variant is resized from the previous one.
+    """
+    largest = max(max(size) for _, size, _ in targets.values())
+    ordered = sorted(targets.items(), key=lambda item: max(item[1][1]), reverse=True)
+    results = {}
+
+    with Image.open(source) as original:
+        original.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(original)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        for variant, (destination, size, quality) in ordered:
+            image = image.copy()
+            image.thumbnail(size, Image.Resampling.LANCZOS)
+            _save_jpeg(image, destination, quality)
+            results[variant] = list(image.size)
+
+    return results
+
+
+def render_video(source, targets, ffmpeg):
+    """Grab one frame with ffmpeg and render the targets from it."""
+    handle, frame = tempfile.mkstemp(suffix='.jpg')
+    os.close(handle)
+    try:
+        for offset in POSTER_OFFSETS:
+            # Very short clips have no frame at one second, fall back to the first
+            completed = subprocess.run(
+                [ffmpeg, '-loglevel', 'error', '-y', '-ss', offset, '-i', source, '-frames:v', '1', frame],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                timeout=120,
+            )
+            if completed.returncode == 0 and os.path.getsize(frame):
+                return render_image(frame, targets)
+        raise RuntimeError(completed.stderr.decode(errors='replace').strip() or 'ffmpeg produced no frame')
+    finally:
+        os.remove(frame)
+
+
+def render(file_type, source, targets, ffmpeg=None):
+    if file_type == 'image':
+        return render_image(source, targets)
+    if file_type == 'video':
+        return render_video(source, targets, ffmpeg)
+    return {}
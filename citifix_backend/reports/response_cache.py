@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from config.caches import is_shared_cache
+
+GENERATION_KEY = 'reports:response-generation:{}'
+
+DEFAULTS = {
+    'MAX_BYTES': 32 * 1024 * 1024,
+    'TTL': 30,
+}
+
+# Roles whose users all see the same reports, and the slice they share
+SHARED_SCOPES = {
+    'media_house': 'public',
+    'superadmin': 'all',
+}
+
+
+def response_cache_setting(name):
+    return getattr(settings, 'REPORT_RESPONSE_CACHE', {}).get(name, DEFAULTS[name])
+
+
+class ResponseCache:
+    """
+    Per-process LRU of rendered report list pages, shared by every user of a
+    role that sees the same slice (media houses: public reports, admins: all).
+
+    Entries keep the list ETag's validators too, so a hit answers both
+    conditional and full polls without touching the database. Keys include
+    the slice's generation from the Django cache.
+    report_changed() bumps the generations of the slices a report is in, so
+    every page of those slices is stale at once while other slices keep
+    their entries. Stale entries are never served and age out of the LRU,
+    which is bounded by the total size of the cached bodies.
+
+    Other processes only see the generations through a shared cache
+    backend, so nothing is cached with a per-process one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.counters = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'invalidations': 0}
+
+    def key_for(self, request):
+        """Cache key for a list request, or None when its response can't be shared."""
+        scope = SHARED_SCOPES.get(getattr(request.user, 'user_type', None))
+        if scope is None or request.accepted_renderer.format != 'json' or not is_shared_cache():
+            return None
+        # Attachment URLs are signed for the requesting user
+        if 'media_attachments' in request.query_params.get('expand', ''):
+            return None
+        return (scope, self.generation(scope), request.build_absolute_uri())
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[3] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters['hits'] += 1
+            return entry[:3]
+
+    def set(self, key, content, content_type, validators):
+        size = len(content)
+        max_bytes = response_cache_setting('MAX_BYTES')
+        # A single huge page would push out everything else
+        if size > max_bytes // 4:
+            return
+        expires = time.monotonic() + response_cache_setting('TTL')
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (content, content_type, validators, expires)
+            self._bytes += size
+            self.counters['stores'] += 1
+            while self._bytes > max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.counters['evictions'] += 1
+
+    def generation(self, scope):
+        return cache.get(GENERATION_KEY.format(scope), 0)
+
+    def report_changed(self, *visibilities):
+        """Invalidate the slices that contained a report before or after a change, once it commits."""
+        scopes = ['all']
+        if 'public' in visibilities:
+            scopes.append('public')
+        transaction.on_commit(lambda: self.invalidate(*scopes))
+
+    def invalidate(self, *scopes):
+        for scope in scopes:
+            generation_key = GENERATION_KEY.format(scope)
+            try:
+                cache.incr(generation_key)
+            except ValueError:
+                cache.set(generation_key, 1, None)
+        with self._lock:
+            self.counters['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else None
+        return stats
+
+    def _remove(self, key):
+        content = self._entries.pop(key)[0]
+        self._bytes -= len(content)
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,136 @@
+import re
+from django.db import connections, router
+from django.db.models import Q
+from .models import Report
+
+FTS_TABLE = 'reports_report_fts'
+PG_INDEX = 'reports_report_search_idx'
+REPORT_TABLE = Report._meta.db_table
+PG_DOCUMENT = (
+    f"to_tsvector('english', coalesce({REPORT_TABLE}.title, '') || ' ' || "
+    f"coalesce({REPORT_TABLE}.description, ''))"
+)
+REINDEX_CHUNK_SIZE = 2000
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _vendor(using=None):
+    return connections[using or router.db_for_write(Report)].vendor
+
+
+def _doc_id(report_id):
+    # FTS5 rows are keyed by a 63-bit integer derived from the report UUID so
+    # a report can be re-indexed with a rowid lookup instead of a table scan.
+    return report_id.int & ((1 << 63) - 1)
+
+
+def create_search_index(using='default', **kwargs):
+    """post_migrate hook: create the full-text index for the current backend."""
+    connection = connections[using]
+
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            tables = connection.introspection.table_names(cursor)
+            if FTS_TABLE in tables:
+                return
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                f"title, description, report_id UNINDEXED, tokenize='porter unicode61')"
+            )
+        rebuild_search_index(using=using)
+    elif connection.vendor == 'postgresql':
+        # Postgres keeps the expression index up to date on every write
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON {REPORT_TABLE} USING gin ({PG_DOCUMENT})"
+            )
+
+
+def index_reports(reports, using=None):
+    using = using or router.db_for_write(Report)
+    if _vendor(using) != 'sqlite':
+        return
+
+    rows = [(_doc_id(report.id), report.title, report.description, report.id.hex) for report in reports]
+    if not rows:
+        return
+
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f"INSERT OR REPLACE INTO {FTS_TABLE}(rowid, title, description, report_id) VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+
+
+def remove_reports(report_ids, using=None):
+    using = using or router.db_for_write(Report)
+    if _vendor(using) != 'sqlite':
+        return
+
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+            [(_doc_id(report_id),) for report_id in report_ids],
+        )
+
+
+def rebuild_search_index(using=None):
+    using = using or router.db_for_write(Report)
+    if _vendor(using) != 'sqlite':
+        return
+
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    reports = Report.objects.using(using).only('id', 'title', 'description').iterator(chunk_size=REINDEX_CHUNK_SIZE)
+    batch = []
+    for report in reports:
+        batch.append(report)
+        if len(batch) >= REINDEX_CHUNK_SIZE:
+            index_reports(batch, using=using)
+            batch = []
+    index_reports(batch, using=using)
+
+
+def report_saved(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not {'title', 'description'} & set(update_fields):
+        return
+    index_reports([instance], using=using)
+
+
+def report_deleted(sender, instance, using=None, **kwargs):
+    remove_reports([instance.id], using=using)
+
+
+def search_queryset(queryset, term):
+    """Filter ``queryset`` to reports matching ``term``, most relevant first."""
+    tokens = TOKEN_RE.findall(term)
+    vendor = _vendor(queryset.db)
+
+    if not tokens or vendor not in ('sqlite', 'postgresql'):
+        return queryset.filter(Q(title__icontains=term) | Q(description__icontains=term))
+
+    if vendor == 'sqlite':
+        # Quote every token so user input can't inject FTS5 syntax. The last
+        # token is a prefix match to support search-as-you-type.
+        terms = ['"%s"' % token.replace('"', '""') for token in tokens]
+        terms[-1] += '*'
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.report_id = {REPORT_TABLE}.id', f'{FTS_TABLE} MATCH %s'],
+            params=[' '.join(terms)],
+            select={'search_rank': f'{FTS_TABLE}.rank'},
+            order_by=['search_rank'],
+        )
+
+    ts_query = ' & '.join(tokens) + ':*'
+    return queryset.extra(
+        where=[f"{PG_DOCUMENT} @@ to_tsquery('english', %s)"],
+        params=[ts_query],
+        select={'search_rank': f"ts_rank({PG_DOCUMENT}, to_tsquery('english', %s))"},
+        select_params=[ts_query],
+        order_by=['-search_rank'],
+    )
@@ -1,19 +1,88 @@
+import os
+import re
+from django.conf import settings
 from rest_framework import serializers
-from .models import Report, ReportActionLog, MediaAttachment
+from .models import Report, ReportActionLog, MediaAttachment, MediaUploadSession
+from files.access import protected_url
+from .derivatives import derivative_urls
+from .uploads import detect_file_type
+
+
+def _query_param_set(request, name):
+    value = request.query_params.get(name, '') if request is not None else ''
+    return {field.strip() for field in value.split(',') if field.strip()}
+
+
+class DynamicFieldsMixin:
+    """
+    Lets clients shape the payload through query params:
+    ?fields=a,b keeps only the listed fields and ?expand=x adds one of the
+    serializer's ``expandable_fields`` (nested data that is off by default).
+    """
+    expandable_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        
+        if request is None:
+            return fields
+        
+        for name in _query_param_set(request, 'expand'):
+            if name in self.expandable_fields and name not in fields:
+                serializer_class, kwargs = self.expandable_fields[name]
+                fields[name] = serializer_class(**kwargs)
+        
+        requested = _query_param_set(request, 'fields')
+        if requested:
+            for name in set(fields) - requested - {'id'}:
+                fields.pop(name)
+        
+        return fields
 
 class MediaAttachmentSerializer(serializers.ModelSerializer):
     file_url = serializers.SerializerMethodField()
+    derivative_urls = serializers.SerializerMethodField()
     
     class Meta:
         model = MediaAttachment
-        fields = ['id', 'file_url', 'file_type', 'file_size', 'created_at']
+        fields = ['id', 'file_url', 'derivative_urls', 'file_type', 'file_size', 'checksum', 'created_at']
     
     def get_file_url(self, obj):
         if obj.file:
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(obj.file.url)
+                return protected_url(request, 'media_file', 'attachment', obj.id)
         return None
+    
+    def get_derivative_urls(self, obj):
+        return derivative_urls(obj, self.context.get('request'))
+
+class MediaUploadSessionSerializer(serializers.ModelSerializer):
+    attachment = MediaAttachmentSerializer(read_only=True)
+    
+    class Meta:
+        model = MediaUploadSession
+        fields = ['id', 'filename', 'file_type', 'is_public', 'total_size', 'received_size', 'checksum', 'attachment', 'created_at']
+        read_only_fields = ['id', 'file_type', 'received_size', 'attachment', 'created_at']
+    
+    def validate_filename(self, value):
+        value = os.path.basename(value.replace('\\', '/'))
+        if not value:
+            raise serializers.ValidationError('A file name is required')
+        if detect_file_type(value) is None:
+            raise serializers.ValidationError('Only image, video and audio files can be uploaded')
+        return value
+    
+    def validate_total_size(self, value):
+        if not 0 < value <= settings.MEDIA_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f'Size must be between 1 and {settings.MEDIA_UPLOAD_MAX_SIZE} bytes')
+        return value
+    
+    def validate_checksum(self, value):
+        if value and not re.fullmatch(r'[0-9a-fA-F]{64}', value):
+            raise serializers.ValidationError('Checksum must be a hex encoded SHA-256 digest')
+        return value.lower()
 
 class ReportActionLogSerializer(serializers.ModelSerializer):
     actor_email = serializers.EmailField(source='actor.email', read_only=True)
@@ -22,12 +91,16 @@ class ReportActionLogSerializer(serializers.ModelSerializer):
         model = ReportActionLog
         fields = ['id', 'action_type', 'description', 'actor_email', 'timestamp']
 
-class ReportSerializer(serializers.ModelSerializer):
+class ReportSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     reporter_email = serializers.EmailField(source='reporter.email', read_only=True)
     assigned_to_email = serializers.EmailField(source='assigned_to.email', read_only=True)
     assigned_to_organization = serializers.SerializerMethodField()
     media_attachments = MediaAttachmentSerializer(many=True, read_only=True)
-    action_logs = ReportActionLogSerializer(many=True, read_only=True)
+    
+    # The full history is paginated at /reports/<id>/timeline/
+    expandable_fields = {
+        'action_logs': (ReportActionLogSerializer, {'many': True, 'read_only': True}),
+    }
     
     class Meta:
         model = Report
@@ -36,12 +109,40 @@ class ReportSerializer(serializers.ModelSerializer):
             'latitude', 'longitude', 'address', 'status', 'visibility',
             'reporter_email', 'assigned_to_email', 'assigned_to_organization',
             'assigned_at', 'resolved_at', 'created_at', 'updated_at',
-            'media_attachments', 'action_logs'
+            'media_attachments', 'action_log_count', 'latest_action'
         ]
         read_only_fields = [
             'id', 'reporter_email', 'created_at', 'updated_at',
-            'assigned_at', 'resolved_at', 'media_attachments', 'action_logs'
+            'assigned_at', 'resolved_at', 'media_attachments',
+            'action_log_count', 'latest_action'
+        ]
+    
+    def get_assigned_to_organization(self, obj):
+        if obj.assigned_to and hasattr(obj.assigned_to, 'authority_profile'):
+            return obj.assigned_to.authority_profile.organization_name
+        return None
+
+class ReportListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    reporter_email = serializers.EmailField(source='reporter.email', read_only=True)
+    assigned_to_email = serializers.EmailField(source='assigned_to.email', read_only=True)
+    assigned_to_organization = serializers.SerializerMethodField()
+    media_attachment_count = serializers.IntegerField(read_only=True)
+    
+    expandable_fields = {
+        'media_attachments': (MediaAttachmentSerializer, {'many': True, 'read_only': True}),
+        'action_logs': (ReportActionLogSerializer, {'many': True, 'read_only': True}),
+    }
+    
+    class Meta:
+        model = Report
+        fields = [
+            'id', 'report_type', 'severity', 'title', 'description',
+            'latitude', 'longitude', 'address', 'status', 'visibility',
+            'reporter_email', 'assigned_to_email', 'assigned_to_organization',
+            'media_attachment_count', 'action_log_count', 'latest_action',
+            'created_at', 'updated_at'
         ]
+        read_only_fields = fields
     
     def get_assigned_to_organization(self, obj):
         if obj.assigned_to and hasattr(obj.assigned_to, 'authority_profile'):
@@ -0,0 +1,128 @@
+import threading
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from notifications.dispatch import dispatch_setting, dispatcher
+from .models import Report, ReportDailyStat
+
+DIMENSIONS = ('status', 'severity', 'report_type', 'visibility')
+
+
+def dimensions(report):
+    bucket = {field: getattr(report, field) for field in DIMENSIONS}
+    bucket['day'] = timezone.localdate(report.created_at or timezone.now())
+    return bucket
+
+
+def _apply(bucket, delta):
+    updated = ReportDailyStat.objects.filter(**bucket).update(count=F('count') + delta)
+    if not updated:
+        stat, created = ReportDailyStat.objects.get_or_create(**bucket, defaults={'count': delta})
+        if not created:
+            ReportDailyStat.objects.filter(pk=stat.pk).update(count=F('count') + delta)
+
+
+def record_created(report):
+    _apply(dimensions(report), 1)
+    transaction.on_commit(publisher.schedule)
+
+
+def record_created_many(reports):
+    # One counter update per distinct bucket rather than per report
+    buckets = Counter(tuple(sorted(dimensions(report).items())) for report in reports)
+    for bucket, count in buckets.items():
+        _apply(dict(bucket), count)
+    if buckets:
+        transaction.on_commit(publisher.schedule)
+
+
+def record_changed(old_bucket, report):
+    new_bucket = dimensions(report)
+    if old_bucket == new_bucket:
+        return
+    _apply(old_bucket, -1)
+    _apply(new_bucket, 1)
+    transaction.on_commit(publisher.schedule)
+
+
+def record_deleted(report):
+    _apply(dimensions(report), -1)
+    transaction.on_commit(publisher.schedule)
+
+
+def rebuild():
+    """Recompute every bucket from the reports table."""
+    rows = Report.objects.annotate(day=TruncDate('created_at')).order_by().values(
+        'day', *DIMENSIONS
+    ).annotate(total=Count('id'))
+
+    with transaction.atomic():
+        ReportDailyStat.objects.all().delete()
+        ReportDailyStat.objects.bulk_create(
+            [ReportDailyStat(count=row.pop('total'), **row) for row in rows],
+            batch_size=1000,
+        )
+
+
+def snapshot(visibility=None, days=30):
+    stats = ReportDailyStat.objects.all()
+    if visibility:
+        stats = stats.filter(visibility=visibility)
+
+    def totals(field):
+        rows = stats.order_by().values(field).annotate(total=Sum('count'))
+        return {row[field]: row['total'] for row in rows if row['total']}
+
+    since = timezone.localdate() - timedelta(days=days - 1)
+    by_day = stats.filter(day__gte=since).order_by('day').values('day').annotate(total=Sum('count'))
+
+    return {
+        'total': stats.aggregate(total=Sum('count'))['total'] or 0,
+        'by_status': totals('status'),
+        'by_severity': totals('severity'),
+        'by_type': totals('report_type'),
+        'by_day': {str(row['day']): row['total'] for row in by_day},
+    }
+
+
+def push_stats():
+    from notifications.services import NotificationService
+
+    NotificationService.send_stats_update(snapshot(), ['superadmin', 'authority'])
+    NotificationService.send_stats_update(snapshot(visibility='public'), ['media_house'])
+
+
+class StatsPublisher:
+    """
+    Coalesces stats_update pushes: the first change starts a timer and every
+    change until it fires is covered by the same push.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def schedule(self):
+        interval = getattr(settings, 'REPORT_STATS_PUSH_INTERVAL', 5)
+        if interval <= 0 or dispatch_setting('SYNCHRONOUS'):
+            dispatcher.submit(push_stats)
+            return
+
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(interval, self._fire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _fire(self):
+        with self._lock:
+            self._timer = None
+        dispatcher.submit(push_stats)
+
+
+publisher = StatsPublisher()
@@ -0,0 +1,168 @@
+import base64
+import json
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from .models import ReportTombstone
+
+DEFAULTS = {
+    'PAGE_SIZE': 200,
+    'TOMBSTONE_RETENTION_DAYS': 30,
+    'SAFETY_MARGIN': 60,
+}
+
+
+def sync_setting(name):
+    return getattr(settings, 'REPORT_SYNC', {}).get(name, DEFAULTS[name])
+
+
+def encode_token(report_position, tombstone_position):
+    values = [
+        [timestamp.isoformat(), str(pk) if pk else None] if timestamp else None
+        for timestamp, pk in (report_position, tombstone_position)
+    ]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_token(value):
+    """
+    Positions of the report and tombstone streams from ``?since=``: either a
+    token from a previous sync or a timestamp. None for an empty value, which
+    asks for the whole list.
+    """
+    if not value:
+        return None
+
+    # An unencoded "+00:00" arrives as " 00:00"
+    timestamp = _parse_timestamp(value.replace(' ', '+'))
+    if timestamp is not None:
+        return (timestamp, None), (timestamp, None)
+
+    try:
+        padded = value + '=' * (-len(value) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        report_position, tombstone_position = [_parse_position(position) for position in values]
+    except (TypeError, ValueError, AttributeError):
+        raise ValidationError({'since': 'Expected a sync token or an ISO 8601 timestamp'})
+    if tombstone_position[0] is None:
+        raise ValidationError({'since': 'Expected a sync token or an ISO 8601 timestamp'})
+    return report_position, tombstone_position
+
+
+def _parse_position(position):
+    if position is None:
+        return None, None
+    timestamp, pk = position
+    timestamp = _parse_timestamp(timestamp)
+    if timestamp is None:
+        raise ValueError(position)
+    return timestamp, uuid.UUID(pk) if pk else None
+
+
+def _parse_timestamp(value):
+    try:
+        timestamp = parse_datetime(value)
+    except ValueError:
+        return None
+    if timestamp is not None and timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    return timestamp
+
+
+def _after(field, position):
+    # (field, id) > (timestamp, pk), or just field > timestamp for a plain timestamp.
+    # Spelled with a leading field >= timestamp so the range can use the index.
+    timestamp, pk = position
+    if timestamp is None:
+        return Q()
+    if pk is None:
+        return Q(**{f'{field}__gt': timestamp})
+    return Q(**{f'{field}__gte': timestamp}) & (Q(**{f'{field}__gt': timestamp}) | Q(id__gt=pk))
+
+
+def changed_reports(queryset, position):
+    return queryset.filter(_after('updated_at', position)).order_by('updated_at', 'id')
+
+
+def removed_reports(user, position):
+    return ReportTombstone.objects.filter(_after('removed_at', position), user_id=user.pk).order_by(
+        'removed_at', 'id'
+    ).only('id', 'report_id', 'removed_at')
+
+
+def _next_position(rows, more, field, cutoff):
+    if more:
+        return getattr(rows[-1], field), rows[-1].id
+    # The stream is exhausted. Stop short of now: a row written by a transaction
+    # that commits late can carry an earlier timestamp than rows already seen
+    return cutoff, None
+
+
+def sync_response(view, queryset, since):
+    """
+    Reports of the user's list created or changed after ``since``, and the
+    ids of reports that left it (tombstones), in (updated_at, id) order.
+
+    Both streams are keyset scans on the sync indexes, so a sync reads only
+    the rows that changed. ``next_since`` continues after the last row of a
+    stream that has more, and from SAFETY_MARGIN seconds before the request
+    for one that is exhausted, so rows from that window can come again.
+    Clients keep syncing while ``has_more`` is true, applying ``deleted``
+    before ``changes``.
+    """
+    started = timezone.now()
+    cutoff = started - timedelta(seconds=sync_setting('SAFETY_MARGIN'))
+    positions = decode_token(since)
+    if positions is None:
+        # A full download needs no deletion history
+        report_position, tombstone_position = (None, None), (cutoff, None)
+    else:
+        report_position, tombstone_position = positions
+        horizon = started - timedelta(days=sync_setting('TOMBSTONE_RETENTION_DAYS'))
+        if tombstone_position[0] < horizon:
+            return Response({
+                'error': 'Sync token is older than the deletion history, download the full list again',
+                'resync_required': True,
+            }, status=status.HTTP_410_GONE)
+
+    page_size = sync_setting('PAGE_SIZE')
+    reports = list(changed_reports(queryset, report_position)[:page_size + 1])
+    tombstones = list(removed_reports(view.request.user, tombstone_position)[:page_size + 1])
+    more_reports, more_tombstones = len(reports) > page_size, len(tombstones) > page_size
+    reports, tombstones = reports[:page_size], tombstones[:page_size]
+
+    report_position = _next_position(reports, more_reports, 'updated_at', cutoff)
+    tombstone_position = _next_position(tombstones, more_tombstones, 'removed_at', cutoff)
+
+    serializer = view.get_serializer(reports, many=True)
+    return Response({
+        'changes': serializer.data,
+        'deleted': [str(tombstone.report_id) for tombstone in tombstones],
+        'next_since': encode_token(report_position, tombstone_position),
+        'has_more': more_reports or more_tombstones,
+    })
+
+
+def record_unassigned(report_id, user_id):
+    ReportTombstone.objects.create(report_id=report_id, user_id=user_id, reason='unassigned')
+
+
+def report_deleted(sender, instance, **kwargs):
+    user_ids = {instance.reporter_id, instance.assigned_to_id} - {None}
+    ReportTombstone.objects.bulk_create([
+        ReportTombstone(report_id=instance.pk, user_id=user_id, reason='deleted')
+        for user_id in user_ids
+    ])
+
+
+def prune_tombstones():
+    """Delete tombstones past the retention window; older sync tokens get 410 and a full download."""
+    horizon = timezone.now() - timedelta(days=sync_setting('TOMBSTONE_RETENTION_DAYS'))
+    deleted, _ = ReportTombstone.objects.filter(removed_at__lt=horizon).delete()
+    return deleted
@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import Report, ReportActionLog
+from .response_cache import response_cache
+from .serializers import ReportActionLogSerializer
+
+REBUILD_CHUNK_SIZE = 500
+
+_summary_serializer = ReportActionLogSerializer()
+
+
+def action_summary(entry):
+    """The ``latest_action`` snapshot of a log entry, in the timeline's format. Needs ``entry.actor``."""
+    return dict(_summary_serializer.to_representation(entry))
+
+
+def log_action(report, actor, action_type, description):
+    """Append an entry to the report's action log, update its summary and invalidate cached list pages showing it."""
+    entry = ReportActionLog.objects.create(report=report, actor=actor, action_type=action_type, description=description)
+    summary = action_summary(entry)
+    now = timezone.now()
+    Report.objects.filter(pk=report.pk).update(
+        action_log_count=F('action_log_count') + 1,
+        latest_action=summary,
+        updated_at=now,
+    )
+    report.action_log_count += 1
+    report.latest_action = summary
+    report.updated_at = now
+    response_cache.report_changed(report.visibility)
+    return entry
+
+
+def rebuild_action_summaries():
+    """Recompute action_log_count and latest_action of every report from the log."""
+    counts = ReportActionLog.objects.filter(report=OuterRef('pk')).order_by().values('report').annotate(
+        count=Count('id')
+    ).values('count')
+
+    with transaction.atomic():
+        Report.objects.update(action_log_count=Coalesce(Subquery(counts), 0), latest_action=None)
+
+        # One lookup on the timeline index per report that has entries
+        report_ids = Report.objects.filter(action_log_count__gt=0).values_list('id', flat=True)
+        batch = []
+        for report_id in report_ids.iterator(chunk_size=REBUILD_CHUNK_SIZE):
+            entry = ReportActionLog.objects.select_related('actor').filter(report_id=report_id).order_by('-timestamp', '-id').first()
+            batch.append(Report(id=report_id, latest_action=action_summary(entry)))
+            if len(batch) >= REBUILD_CHUNK_SIZE:
+                Report.objects.bulk_update(batch, ['latest_action'])
+                batch = []
+        Report.objects.bulk_update(batch, ['latest_action'])
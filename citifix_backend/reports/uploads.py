@@ -0,0 +1,148 @@
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from django.core.files import File
+from .models import MediaAttachment
+
+READ_BLOCK_SIZE = 64 * 1024
+HASHER_CACHE_SIZE = 256
+
+# Running sha256 state per upload session, so a chunk only hashes its own
+# bytes. Entries remember the offset they cover; on a miss (another process
+# took the previous chunk, or a restart) the digest is rebuilt from the
+# partial file.
+_hashers = OrderedDict()
+_hashers_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    pass
+
+
+def detect_file_type(filename):
+    content_type, _ = mimetypes.guess_type(filename)
+    if content_type:
+        kind = content_type.split('/', 1)[0]
+        if kind in dict(MediaAttachment.FILE_TYPES):
+            return kind
+    return None
+
+
+def _take_hasher(session):
+    with _hashers_lock:
+        cached = _hashers.pop(session.id, None)
+    if cached is not None and cached[0] == session.received_size:
+        return cached[1]
+
+    hasher = hashlib.sha256()
+    remaining = session.received_size
+    if remaining:
+        with open(session.partial_path, 'rb') as handle:
+            while remaining:
+                block = handle.read(min(READ_BLOCK_SIZE, remaining))
+                if not block:
+                    raise UploadError('Partial upload is shorter than recorded')
+                hasher.update(block)
+                remaining -= len(block)
+    return hasher
+
+
+def _keep_hasher(session, hasher):
+    with _hashers_lock:
+        _hashers[session.id] = (session.received_size, hasher)
+        _hashers.move_to_end(session.id)
+        while len(_hashers) > HASHER_CACHE_SIZE:
+            _hashers.popitem(last=False)
+
+
+def _forget_hasher(session):
+    with _hashers_lock:
+        _hashers.pop(session.id, None)
+
+
+def append_chunk(session, stream, length):
+    """
+    Copy ``length`` bytes from ``stream`` to the end of the partial file in
+    small blocks. Whatever arrives before a dropped connection is kept, so the
+    client can resume from the returned offset.
+    """
+    if session.received_size + length > session.total_size:
+        raise UploadError('Chunk goes past the declared upload size')
+
+    hasher = _take_hasher(session)
+    path = session.partial_path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    written = 0
+    with open(path, 'r+b' if os.path.exists(path) else 'wb') as handle:
+        # Drop any tail left by a request that died before saving its offset
+        handle.seek(session.received_size)
+        handle.truncate()
+        while written < length:
+            try:
+                block = stream.read(min(READ_BLOCK_SIZE, length - written))
+            except OSError:
+                break
+            if not block:
+                break
+            handle.write(block)
+            hasher.update(block)
+            written += len(block)
+
+    session.received_size += written
+    _keep_hasher(session, hasher)
+    return written
+
+
+def complete_upload(session):
+    """Move a fully received upload into place and attach it to the report."""
+    hasher = _take_hasher(session)
+    checksum = hasher.hexdigest()
+    if session.checksum and session.checksum.lower() != checksum:
+        discard_upload(session)
+        session.received_size = 0
+        raise UploadError('Checksum mismatch, the upload has been reset')
+
+    attachment = MediaAttachment(
+        report=session.report,
+        file_type=session.file_type,
+        file_size=session.total_size,
+        checksum=checksum,
+        uploaded_by=session.uploaded_by,
+        is_public=session.is_public,
+    )
+    field = attachment.file.field
+    storage = field.storage
+    name = field.generate_filename(attachment, session.filename)
+
+    if hasattr(storage, 'adopt'):
+        # Content addressed storage: the digest is known already, so the
+        # file is moved in (or dropped as a duplicate) without reading it again
+        name = storage.adopt(session.partial_path, checksum, session.total_size, name)
+    else:
+        name = storage.get_available_name(name)
+        try:
+            destination = storage.path(name)
+        except NotImplementedError:
+            # Remote storage: stream the file up in chunks
+            with open(session.partial_path, 'rb') as handle:
+                name = storage.save(name, File(handle))
+            os.remove(session.partial_path)
+        else:
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            os.replace(session.partial_path, destination)
+
+    attachment.file.name = name
+    attachment.save()
+    _forget_hasher(session)
+    return attachment
+
+
+def discard_upload(session):
+    _forget_hasher(session)
+    try:
+        os.remove(session.partial_path)
+    except FileNotFoundError:
+        pass
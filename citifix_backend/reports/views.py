@@ -1,23 +1,91 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
+from rest_framework.reverse import reverse
+from rest_framework.exceptions import ValidationError
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
-from .models import Report, ReportActionLog, MediaAttachment
-from .serializers import ReportSerializer, CreateReportSerializer
+from django.utils.dateparse import parse_date, parse_datetime
+from .models import Report, ReportActionLog, MediaAttachment, MediaUploadSession
+from .serializers import ReportSerializer, ReportListSerializer, CreateReportSerializer, MediaUploadSessionSerializer, ReportActionLogSerializer
+from .search import search_queryset
+from .ingest import create_reports
+from .response_cache import response_cache
+from .timeline import log_action
+from .uploads import UploadError, append_chunk, complete_upload, detect_file_type, discard_upload
+from . import etags, geo, stats, sync
 from notifications.services import NotificationService
+from notifications.dispatch import dispatcher
+from config.pagination import OptionalKeysetPagination, TimelinePagination
+
+DEFAULT_RADIUS_KM = 5
+MAX_RADIUS_KM = 500
+LIST_ACTIONS = ('list', 'my_reports', 'assigned_to_me')
+
+EXPORT_FIELDS = (
+    ('id', 'id'),
+    ('report_type', 'report_type'),
+    ('severity', 'severity'),
+    ('status', 'status'),
+    ('visibility', 'visibility'),
+    ('title', 'title'),
+    ('description', 'description'),
+    ('latitude', 'latitude'),
+    ('longitude', 'longitude'),
+    ('address', 'address'),
+    ('reporter_email', 'reporter__email'),
+    ('assigned_to_email', 'assigned_to__email'),
+    ('assigned_at', 'assigned_at'),
+    ('resolved_at', 'resolved_at'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+)
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_ROWS_PER_WRITE = 200
+
+class Echo:
+    """File-like object whose write() hands the value back, for csv.writer."""
+    def write(self, value):
+        return value
 
 class ReportViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptionalKeysetPagination
     
     def get_serializer_class(self):
         if self.action == 'create':
             return CreateReportSerializer
+        if self.action in LIST_ACTIONS:
+            return ReportListSerializer
         return ReportSerializer
 
     def get_queryset(self):
         user = self.request.user
-        queryset = Report.objects.select_related('reporter', 'assigned_to').prefetch_related('media_attachments', 'action_logs')
+        queryset = Report.objects.select_related('reporter', 'assigned_to')
+        
+        # Only load the related data the serializer is going to render
+        if self.action not in ('create', 'export', 'timeline'):
+            fields = self.get_serializer().fields
+            if 'assigned_to_organization' in fields:
+                queryset = queryset.select_related('assigned_to__authority_profile')
+            if 'media_attachments' in fields:
+                queryset = queryset.prefetch_related('media_attachments')
+            if 'action_logs' in fields:
+                queryset = queryset.prefetch_related('action_logs__actor')
+            if 'media_attachment_count' in fields:
+                media_count = MediaAttachment.objects.filter(
+                    report=OuterRef('pk')
+                ).order_by().values('report').annotate(count=Count('id')).values('count')
+                queryset = queryset.annotate(media_attachment_count=Coalesce(Subquery(media_count), 0))
         
         # Media houses can only see public reports
         if user.user_type == 'media_house':
@@ -45,26 +113,245 @@ class ReportViewSet(viewsets.ModelViewSet):
         if report_type:
             queryset = queryset.filter(report_type=report_type)
         if search:
+            queryset = search_queryset(queryset, search)
+        
+        # Location filters
+        near = self.request.query_params.get('near')
+        bbox = self.request.query_params.get('bbox')
+        
+        if near:
+            latitude, longitude = self._parse_coordinates(near, 2, 'near')
+            radius_km = self._parse_radius(self.request.query_params.get('radius_km'))
             queryset = queryset.filter(
-                Q(title__icontains=search) | 
-                Q(description__icontains=search)
-            )
+                geo.radius_q(latitude, longitude, radius_km)
+            ).annotate(
+                distance_km=geo.distance_km_expression(latitude, longitude)
+            ).filter(distance_km__lte=radius_km)
+        if bbox:
+            min_lng, min_lat, max_lng, max_lat = self._parse_coordinates(bbox, 4, 'bbox')
+            if min_lat > max_lat or min_lng > max_lng:
+                raise ValidationError({'bbox': 'Expected min_lng,min_lat,max_lng,max_lat'})
+            queryset = queryset.filter(geo.bbox_q(min_lat, min_lng, max_lat, max_lng))
         
         return queryset
 
+    def _parse_coordinates(self, value, count, param):
+        try:
+            numbers = [float(part) for part in value.split(',')]
+        except ValueError:
+            numbers = []
+        
+        if len(numbers) != count:
+            raise ValidationError({param: f'Expected {count} comma separated numbers'})
+        
+        for index, number in enumerate(numbers):
+            # near is lat,lng while bbox follows the GeoJSON lng,lat order
+            is_latitude = (index % 2 == 0) if param == 'near' else (index % 2 == 1)
+            limit = 90 if is_latitude else 180
+            if not -limit <= number <= limit:
+                raise ValidationError({param: 'Coordinates out of range'})
+        
+        return numbers
+
+    def _parse_radius(self, value):
+        if value is None:
+            return DEFAULT_RADIUS_KM
+        try:
+            radius_km = float(value)
+        except ValueError:
+            raise ValidationError({'radius_km': 'Must be a number'})
+        if not 0 < radius_km <= MAX_RADIUS_KM:
+            raise ValidationError({'radius_km': f'Must be between 0 and {MAX_RADIUS_KM}'})
+        return radius_km
+
+    def list(self, request, *args, **kwargs):
+        # Media houses (and admins) all see the same reports, so their pages are shared
+        cache_key = response_cache.key_for(request)
+        if cache_key is not None:
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                return self._cached_list_response(*cached)
+        return self._list_response(self.filter_queryset(self.get_queryset()), cache_key)
+
+    def retrieve(self, request, *args, **kwargs):
+        etag = etags.detail_etag(request, self.get_queryset(), kwargs['pk'])
+        if etags.not_modified(request, etag):
+            return etags.not_modified_response(etag)
+        return etags.tag_response(super().retrieve(request, *args, **kwargs), etag)
+
+    def _list_response(self, queryset, cache_key=None):
+        # Polling dashboards mostly get a 304 answered from the keys of the page's rows
+        validators = etags.list_validators(self.request, queryset, self.paginator)
+        etag = etags.list_etag(self.request, validators)
+        if etags.not_modified(self.request, etag):
+            return etags.not_modified_response(etag)
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            response = self.get_paginated_response(serializer.data)
+        else:
+            serializer = self.get_serializer(queryset, many=True)
+            response = Response(serializer.data)
+        if cache_key is not None:
+            # Stored by finalize_response once rendered
+            response.cache_entry = (cache_key, validators)
+        return etags.tag_response(response, etag)
+
+    def _cached_list_response(self, content, content_type, validators):
+        etag = etags.list_etag(self.request, validators)
+        if etags.not_modified(self.request, etag):
+            return etags.not_modified_response(etag)
+        return etags.tag_response(HttpResponse(content, content_type=content_type), etag)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        cache_entry = getattr(response, 'cache_entry', None)
+        if cache_entry is not None and response.status_code == status.HTTP_200_OK:
+            cache_key, validators = cache_entry
+            response.render()
+            response_cache.set(cache_key, response.content, response['Content-Type'], validators)
+        return response
+
     def perform_create(self, serializer):
         report = serializer.save(reporter=self.request.user)
         
         # Create initial action log
-        ReportActionLog.objects.create(
-            report=report,
-            actor=self.request.user,
-            action_type='status_change',
-            description=f'Report created with status: {report.status}'
-        )
+        log_action(report, self.request.user, 'status_change', f'Report created with status: {report.status}')
+        
+        stats.record_created(report)
         
-        # Send real-time notification
-        NotificationService.send_new_report_notification(report)
+        # Send real-time notification once the report is committed
+        dispatcher.dispatch_on_commit(NotificationService.send_new_report_notification, report)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Create a batch of reports, for partner systems pushing many incidents at once."""
+        if request.user.user_type not in ('authority', 'superadmin'):
+            return Response({'error': 'Only authorities and admins can submit reports in bulk'},
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        items = request.data.get('reports') if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'reports must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.REPORT_BULK_MAX_SIZE:
+            return Response({'error': f'At most {settings.REPORT_BULK_MAX_SIZE} reports per request'},
+                          status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        
+        results, reports = create_reports(items, request.user)
+        if len(reports) == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif reports:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        
+        return Response({
+            'created': len(reports),
+            'failed': len(results) - len(reports),
+            'results': results,
+        }, status=response_status)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.instance = self._locked_report(serializer.instance)
+            old_bucket = stats.dimensions(serializer.instance)
+            report = serializer.save()
+            stats.record_changed(old_bucket, report)
+        response_cache.report_changed(old_bucket['visibility'], report.visibility)
+
+    def perform_destroy(self, instance):
+        stats.record_deleted(instance)
+        response_cache.report_changed(instance.visibility)
+        instance.delete()
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        if request.user.user_type == 'citizen':
+            return Response({'error': 'Only authorities, media houses and admins can access this'},
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            days = min(max(int(request.query_params.get('days', 30)), 1), 365)
+        except ValueError:
+            return Response({'error': 'days must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Media houses only see figures for public reports
+        visibility = 'public' if request.user.user_type == 'media_house' else None
+        return Response(stats.snapshot(visibility=visibility, days=days))
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in ('csv', 'ndjson'):
+            return Response({'error': 'file_format must be csv or ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        queryset = self.get_queryset()
+        
+        # Time window on created_at
+        for param, lookup in (('start', 'created_at__gte'), ('end', 'created_at__lte')):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            moment = self._parse_moment(value, end_of_day=(param == 'end'))
+            if moment is None:
+                return Response({'error': f'Invalid {param} date'}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(**{lookup: moment})
+        
+        # Plain value rows streamed in chunks keep memory flat however many rows match
+        columns = [name for name, _ in EXPORT_FIELDS]
+        rows = queryset.order_by('created_at', 'id').values_list(
+            *(source for _, source in EXPORT_FIELDS)
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        
+        if file_format == 'csv':
+            content = self._csv_stream(columns, rows)
+            content_type = 'text/csv'
+        else:
+            content = self._ndjson_stream(columns, rows)
+            content_type = 'application/x-ndjson'
+        
+        response = StreamingHttpResponse(content, content_type=content_type)
+        filename = f"reports-{timezone.now():%Y%m%d-%H%M%S}.{file_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def _parse_moment(self, value, end_of_day=False):
+        moment = parse_datetime(value)
+        if moment is None:
+            try:
+                day = parse_date(value)
+            except ValueError:
+                return None
+            if day is None:
+                return None
+            moment = datetime.combine(day, time.max if end_of_day else time.min)
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
+
+    def _csv_stream(self, columns, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(columns)
+        
+        lines = []
+        for row in rows:
+            lines.append(writer.writerow(row))
+            if len(lines) >= EXPORT_ROWS_PER_WRITE:
+                yield ''.join(lines)
+                lines = []
+        if lines:
+            yield ''.join(lines)
+
+    def _ndjson_stream(self, columns, rows):
+        lines = []
+        for row in rows:
+            lines.append(json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n')
+            if len(lines) >= EXPORT_ROWS_PER_WRITE:
+                yield ''.join(lines)
+                lines = []
+        if lines:
+            yield ''.join(lines)
 
     @action(detail=False, methods=['get'])
     def my_reports(self, request):
@@ -72,15 +359,10 @@ class ReportViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Only citizens can access this'}, 
                           status=status.HTTP_403_FORBIDDEN)
         
-        reports = self.get_queryset().filter(reporter=request.user)
-        page = self.paginate_queryset(reports)
-        
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(reports, many=True)
-        return Response(serializer.data)
+        queryset = self.get_queryset().filter(reporter=request.user)
+        if 'since' in request.query_params:
+            return sync.sync_response(self, queryset, request.query_params['since'])
+        return self._list_response(queryset)
 
     @action(detail=False, methods=['get'])
     def assigned_to_me(self, request):
@@ -88,15 +370,10 @@ class ReportViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Only authorities can access this'}, 
                           status=status.HTTP_403_FORBIDDEN)
         
-        reports = self.get_queryset().filter(assigned_to=request.user)
-        page = self.paginate_queryset(reports)
-        
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(reports, many=True)
-        return Response(serializer.data)
+        queryset = self.get_queryset().filter(assigned_to=request.user)
+        if 'since' in request.query_params:
+            return sync.sync_response(self, queryset, request.query_params['since'])
+        return self._list_response(queryset)
 
     @action(detail=True, methods=['patch'])
     def update_status(self, request, pk=None):
@@ -109,75 +386,203 @@ class ReportViewSet(viewsets.ModelViewSet):
         if new_status not in dict(Report.STATUS_CHOICES):
             return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
         
-        old_status = report.status
-        report.status = new_status
+        with transaction.atomic():
+            report = self._locked_report(report)
+            old_status = report.status
+            old_bucket = stats.dimensions(report)
+            report.status = new_status
+            
+            if new_status == 'resolved':
+                report.resolved_at = timezone.now()
+            
+            report.save()
+            stats.record_changed(old_bucket, report)
+            
+            # Create action log
+            log_action(report, request.user, 'status_change', f'Status changed from {old_status} to {new_status}')
+            
+            # Send real-time update once the change is committed
+            dispatcher.dispatch_on_commit(NotificationService.send_report_update, report.id, report.reporter_id)
         
-        if new_status == 'resolved':
-            report.resolved_at = timezone.now()
+        serializer = self.get_serializer(report)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['post'])
+    def add_note(self, request, pk=None):
+        report = self.get_object()
+        note = request.data.get('note')
+        
+        if not note:
+            return Response({'error': 'Note is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        report.save()
+        action_log = log_action(report, request.user, 'note_added', note)
         
-        # Create action log
-        ReportActionLog.objects.create(
-            report=report,
-            actor=request.user,
-            action_type='status_change',
-            description=f'Status changed from {old_status} to {new_status}'
+        serializer = ReportActionLogSerializer(action_log)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """The report's action log, newest first, in keyset pages (``?cursor=`` / ``?newer_than=``)."""
+        report = self.get_object()
+        entries = ReportActionLog.objects.filter(report=report).select_related('actor').only(
+            'id', 'action_type', 'description', 'timestamp', 'actor__email'
         )
         
-        # Send real-time update
-        NotificationService.send_report_update(report.id, report.reporter.id)
+        paginator = TimelinePagination()
+        page = paginator.paginate_queryset(entries, request, view=self)
+        serializer = ReportActionLogSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['patch'], url_path='assign')
+    def assign_report(self, request, pk=None):
+        report = self.get_object()
+        authority_id = request.data.get('authority_id')
+        
+        if authority_id:
+            from users.models import User
+            try:
+                authority = User.objects.get(id=authority_id, user_type='authority', status='active')
+            except (User.DoesNotExist, DjangoValidationError):
+                return Response({'error': 'Authority not found'}, status=status.HTTP_404_NOT_FOUND)
+        else:
+            authority = request.user
+        
+        with transaction.atomic():
+            report = self._locked_report(report)
+            old_bucket = stats.dimensions(report)
+            old_assignee_id = report.assigned_to_id
+            report.assigned_to = authority
+            report.assigned_at = timezone.now()
+            report.status = 'assigned'
+            report.save()
+            stats.record_changed(old_bucket, report)
+            if old_assignee_id and old_assignee_id != authority.id:
+                # Drops out of the previous assignee's synced list
+                sync.record_unassigned(report.id, old_assignee_id)
+            
+            # Create action log
+            log_action(report, request.user, 'assignment', f'Report assigned to {authority.email}')
+            
+            # Send real-time update once the assignment is committed
+            dispatcher.dispatch_on_commit(NotificationService.send_report_update, report.id, authority.id)
         
         serializer = self.get_serializer(report)
         return Response(serializer.data)
 
     @action(detail=True, methods=['post'])
-    def add_note(self, request, pk=None):
+    def uploads(self, request, pk=None):
         report = self.get_object()
-        note = request.data.get('note')
+        user = request.user
         
-        if not note:
-            return Response({'error': 'Note is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if user.id not in (report.reporter_id, report.assigned_to_id) and user.user_type != 'superadmin':
+            return Response({'error': 'You cannot attach media to this report'},
+                          status=status.HTTP_403_FORBIDDEN)
         
-        action_log = ReportActionLog.objects.create(
+        serializer = MediaUploadSessionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = serializer.save(
             report=report,
-            actor=request.user,
-            action_type='note_added',
-            description=note
+            uploaded_by=user,
+            file_type=detect_file_type(serializer.validated_data['filename']),
         )
         
-        serializer = ReportActionLogSerializer(action_log)
-        return Response(serializer.data)
+        response = Response(serializer.data, status=status.HTTP_201_CREATED)
+        response['Location'] = reverse('report-upload-chunk', kwargs={'upload_id': session.id}, request=request)
+        response['Upload-Offset'] = '0'
+        return response
 
-@action(detail=True, methods=['patch'])
-def assign_report(self, request, pk=None):
-    report = self.get_object()
-    authority_id = request.data.get('authority_id')
-    
-    if authority_id:
-        from apps.users.models import User
+    @action(detail=False, methods=['get', 'patch', 'delete'], url_path=r'uploads/(?P<upload_id>[0-9a-f-]{32,36})')
+    def upload_chunk(self, request, upload_id=None):
+        """
+        Resumable upload of one file in chunks. GET returns the current offset,
+        PATCH appends the raw request body at the ``Upload-Offset`` header and
+        DELETE cancels the upload.
+        """
+        with transaction.atomic():
+            session = self._locked_upload(request, upload_id)
+            if session is None:
+                return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+            
+            if request.method == 'GET':
+                return self._upload_response(session)
+            
+            expired = timezone.now() - timedelta(seconds=settings.MEDIA_UPLOAD_CHUNK_TIMEOUT)
+            writing = session.writing_since is not None and session.writing_since > expired
+            
+            if request.method == 'DELETE':
+                if session.is_complete or writing:
+                    return Response({'error': 'Upload is already complete' if session.is_complete else 'A chunk is being written'},
+                                  status=status.HTTP_409_CONFLICT)
+                discard_upload(session)
+                session.delete()
+                return Response(status=status.HTTP_204_NO_CONTENT)
+            
+            if session.is_complete:
+                return Response({'error': 'Upload is already complete'}, status=status.HTTP_409_CONFLICT)
+            
+            try:
+                offset = int(request.headers.get('Upload-Offset', ''))
+                length = int(request.META.get('CONTENT_LENGTH') or '')
+            except ValueError:
+                return Response({'error': 'Upload-Offset and Content-Length headers are required'},
+                              status=status.HTTP_400_BAD_REQUEST)
+            if offset != session.received_size or writing:
+                return self._upload_response(session, status.HTTP_409_CONFLICT)
+            if not 0 < length <= settings.MEDIA_UPLOAD_MAX_CHUNK_SIZE:
+                return Response({'error': f'Chunks must be between 1 and {settings.MEDIA_UPLOAD_MAX_CHUNK_SIZE} bytes'},
+                              status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            
+            # Reserve the offset; the chunk is read without holding the row lock
+            reserved = timezone.now()
+            session.writing_since = reserved
+            session.save(update_fields=['writing_since'])
+        
+        error = None
         try:
-            authority = User.objects.get(id=authority_id, user_type='authority', status='active')
-        except User.DoesNotExist:
-            return Response({'error': 'Authority not found'}, status=status.HTTP_404_NOT_FOUND)
-    else:
-        authority = request.user
-    
-    report.assigned_to = authority
-    report.assigned_at = timezone.now()
-    report.status = 'assigned'
-    report.save()
-    
-    # Create action log
-    ReportActionLog.objects.create(
-        report=report,
-        actor=request.user,
-        action_type='assignment',
-        description=f'Report assigned to {authority.email}'
-    )
-    
-    # Send real-time update
-    NotificationService.send_report_update(report.id, authority.id)
-    
-    serializer = self.get_serializer(report)
-    return Response(serializer.data)
\ No newline at end of file
+            # The body is read straight off the socket, it never goes through a parser
+            append_chunk(session, request.stream, length)
+        except UploadError as exc:
+            error = exc
+        
+        with transaction.atomic():
+            current = self._locked_upload(request, upload_id)
+            if current is None:
+                return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+            if current.writing_since != reserved:
+                # The reservation timed out and another request took the offset over
+                return self._upload_response(current, status.HTTP_409_CONFLICT)
+            
+            current.received_size = session.received_size
+            current.writing_since = None
+            if error is None and current.received_size == current.total_size:
+                try:
+                    current.attachment = complete_upload(current)
+                except UploadError as exc:
+                    error = exc
+            current.save(update_fields=['received_size', 'attachment', 'writing_since', 'updated_at'])
+        
+        if error is not None:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return self._upload_response(current)
+
+    def _locked_report(self, report):
+        # Stats buckets are computed from the row as it is while locked, not
+        # from a copy another request may have changed since it was read
+        return Report.objects.select_for_update(of=('self',)).select_related(
+            'reporter', 'assigned_to__authority_profile'
+        ).get(pk=report.pk)
+
+    def _locked_upload(self, request, upload_id):
+        try:
+            return MediaUploadSession.objects.select_for_update().select_related('report').get(
+                id=upload_id, uploaded_by=request.user
+            )
+        except (MediaUploadSession.DoesNotExist, DjangoValidationError):
+            return None
+
+    def _upload_response(self, session, status_code=status.HTTP_200_OK):
+        serializer = MediaUploadSessionSerializer(session, context=self.get_serializer_context())
+        response = Response(serializer.data, status=status_code)
+        response['Upload-Offset'] = str(session.received_size)
+        response['Upload-Length'] = str(session.total_size)
+        return response
@@ -0,0 +1,74 @@
+import atexit
+import threading
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Case, DateTimeField, Value, When
+from .models import User
+
+FLUSH_BATCH_SIZE = 500
+
+DEFAULTS = {
+    'DEFERRED': False,
+    'FLUSH_INTERVAL': 5,
+}
+
+
+def login_tracking_setting(name):
+    return getattr(settings, 'LOGIN_TRACKING', {}).get(name, DEFAULTS[name])
+
+
+class LastLoginRecorder:
+    """
+    Writes User.last_login_at with a single column UPDATE.
+
+    With LOGIN_TRACKING['DEFERRED'] the writes are buffered instead: the
+    first login starts a timer, and every login until it fires is flushed in
+    one statement per FLUSH_BATCH_SIZE users. A user logging in several
+    times in that window costs one write.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+
+    def record(self, user_id, moment):
+        if not login_tracking_setting('DEFERRED'):
+            User.objects.filter(pk=user_id).update(last_login_at=moment)
+            return
+
+        with self._lock:
+            self._pending[user_id] = moment
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(login_tracking_setting('FLUSH_INTERVAL'), self._fire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        items = list(pending.items())
+        for start in range(0, len(items), FLUSH_BATCH_SIZE):
+            batch = items[start:start + FLUSH_BATCH_SIZE]
+            User.objects.filter(pk__in=[user_id for user_id, _ in batch]).update(
+                last_login_at=Case(
+                    *[When(pk=user_id, then=Value(moment)) for user_id, moment in batch],
+                    output_field=DateTimeField(),
+                )
+            )
+        return len(items)
+
+    def _fire(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            close_old_connections()
+
+
+last_login_recorder = LastLoginRecorder()
+# Don't lose buffered logins on a clean shutdown
+atexit.register(last_login_recorder.flush)
@@ -1,31 +1,66 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR
+from django.db.models import Q
 from .models import User, CitizenProfile, AuthorityProfile, MediaHouseProfile, VerificationDocument
+from .search import search_users
+from .verification import membership_changed
+
+
+class UserSearchMixin:
+    """Admin search backed by users.search, exact matches listed first."""
+    user_lookup = ''
+    exact_search_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        exact = Q()
+        for field in self.exact_search_fields:
+            exact |= Q(**{field: search_term})
+        results = search_users(queryset, search_term, lookup=self.user_lookup, exact=exact or None)
+        if ORDER_VAR in request.GET:
+            # A column was picked, so its ordering wins over relevance
+            results = results.order_by(*queryset.query.order_by)
+        return results, False
+
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(UserSearchMixin, admin.ModelAdmin):
     list_display = ['email', 'user_type', 'status', 'created_at']
     list_filter = ['user_type', 'status']
     search_fields = ['email', 'phone']
+    search_help_text = 'Email, phone or profile name'
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and 'status' in form.changed_data:
+            membership_changed([obj.pk])
 
 @admin.register(CitizenProfile)
-class CitizenProfileAdmin(admin.ModelAdmin):
+class CitizenProfileAdmin(UserSearchMixin, admin.ModelAdmin):
     list_display = ['first_name', 'last_name', 'user']
     search_fields = ['first_name', 'last_name', 'user__email']
+    user_lookup = 'user__'
 
 @admin.register(AuthorityProfile)
-class AuthorityProfileAdmin(admin.ModelAdmin):
+class AuthorityProfileAdmin(UserSearchMixin, admin.ModelAdmin):
     list_display = ['organization_name', 'authority_type', 'verified_at']
     list_filter = ['authority_type']
     search_fields = ['organization_name', 'license_number']
+    user_lookup = 'user__'
+    exact_search_fields = ['license_number']
 
 @admin.register(MediaHouseProfile)
-class MediaHouseProfileAdmin(admin.ModelAdmin):
+class MediaHouseProfileAdmin(UserSearchMixin, admin.ModelAdmin):
     list_display = ['company_name', 'media_type', 'verified_at']
     list_filter = ['media_type']
     search_fields = ['company_name', 'registration_number']
+    user_lookup = 'user__'
+    exact_search_fields = ['registration_number']
 
 @admin.register(VerificationDocument)
 class VerificationDocumentAdmin(admin.ModelAdmin):
     list_display = ['user', 'document_type', 'document_name', 'uploaded_at']
     list_filter = ['document_type']
-    search_fields = ['user__email', 'document_name']
\ No newline at end of file
+    search_fields = ['user__email', 'document_name']
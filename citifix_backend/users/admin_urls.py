@@ -4,6 +4,9 @@ from . import views
 urlpatterns = [
     path('pending-verifications/', views.PendingVerificationsView.as_view(), name='pending_verifications'),
     path('users/', views.AllUsersView.as_view(), name='all_users'),
+    path('users/bulk-verify/', views.bulk_verify_users, name='bulk_verify_users'),
+    path('users/bulk-reject/', views.bulk_reject_users, name='bulk_reject_users'),
     path('users/<uuid:user_id>/verify/', views.verify_user, name='verify_user'),
     path('users/<uuid:user_id>/reject/', views.reject_user, name='reject_user'),
+    path('metrics/', views.metrics, name='metrics'),
 ]
\ No newline at end of file
@@ -1,6 +1,36 @@
 from django.apps import AppConfig
+from django.core import checks
+from django.db.models.signals import post_delete, post_migrate, post_save
 
 
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "users"
+
+    def ready(self):
+        from config.caches import shared_cache_check
+        from files.storage import file_releaser
+        from . import search
+        from .authentication import profile_changed, user_changed
+        from .models import AuthorityProfile, CitizenProfile, MediaHouseProfile, User, VerificationDocument
+
+        post_delete.connect(
+            file_releaser('document_file'),
+            sender=VerificationDocument,
+            weak=False,
+            dispatch_uid='verification_document_release_file',
+        )
+
+        # Cached authentication must see status and profile changes straight away
+        post_save.connect(user_changed, sender=User, dispatch_uid='auth_cache_user_saved')
+        post_delete.connect(user_changed, sender=User, dispatch_uid='auth_cache_user_deleted')
+        for profile_model in (CitizenProfile, AuthorityProfile, MediaHouseProfile):
+            post_save.connect(profile_changed, sender=profile_model, dispatch_uid=f'auth_cache_{profile_model.__name__}_saved')
+
+        checks.register(shared_cache_check, checks.Tags.caches)
+
+        post_migrate.connect(search.create_search_index, sender=self)
+        post_save.connect(search.user_saved, sender=User, dispatch_uid='user_search_saved')
+        post_delete.connect(search.user_deleted, sender=User, dispatch_uid='user_search_deleted')
+        for profile_model in (CitizenProfile, AuthorityProfile, MediaHouseProfile):
+            post_save.connect(search.profile_saved, sender=profile_model, dispatch_uid=f'user_search_{profile_model.__name__}_saved')
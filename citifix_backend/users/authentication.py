@@ -0,0 +1,144 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from config.caches import is_shared_cache
+from .serializers import PROFILE_RELATIONS
+
+VERSION_KEY = 'users:auth-version:{}'
+
+DEFAULTS = {
+    'TTL': 30,
+    'MAX_ENTRIES': 2048,
+}
+
+
+def auth_cache_setting(name):
+    return getattr(settings, 'AUTH_USER_CACHE', {}).get(name, DEFAULTS[name])
+
+
+class UserCache:
+    """
+    Per-process LRU of users resolved from access tokens, with their profile
+    already loaded.
+
+    Each entry remembers the user's version from the Django cache, and
+    invalidate() bumps that version, so a change in one worker evicts the
+    user everywhere. That needs a shared cache backend; with a per-process
+    one every lookup loads the user.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.counters = {'hits': 0, 'misses': 0, 'stale': 0, 'evictions': 0, 'invalidations': 0}
+
+    def resolve(self, user_id, load):
+        if not is_shared_cache():
+            return load()
+        key = str(user_id)
+        # Read the version before loading, so a change made meanwhile is not cached as current
+        version = cache.get(VERSION_KEY.format(key), 0)
+        user = self._lookup(key, version)
+        if user is None:
+            user = load()
+            self._store(key, version, user)
+        return user
+
+    def invalidate(self, user_id):
+        key = str(user_id)
+        version_key = VERSION_KEY.format(key)
+        try:
+            cache.incr(version_key)
+        except ValueError:
+            cache.set(version_key, 1, None)
+        with self._lock:
+            self._entries.pop(key, None)
+            self.counters['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else None
+        return stats
+
+    def _lookup(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.counters['misses'] += 1
+                return None
+
+            user, stored_version, expires = entry
+            if stored_version != version or expires < time.monotonic():
+                del self._entries[key]
+                self.counters['stale'] += 1
+                self.counters['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.counters['hits'] += 1
+            return user
+
+    def _store(self, key, version, user):
+        expires = time.monotonic() + auth_cache_setting('TTL')
+        with self._lock:
+            self._entries[key] = (user, version, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > auth_cache_setting('MAX_ENTRIES'):
+                self._entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that serves the user (and profile) from user_cache."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = user_cache.resolve(user_id, lambda: self.load_user(user_id))
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        # Every request gets its own instance and profile, the cached ones are never handed out
+        return copy.deepcopy(user)
+
+    def load_user(self, user_id):
+        try:
+            return self.user_model.objects.select_related(*PROFILE_RELATIONS.values()).get(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+
+def user_changed(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
+
+
+def profile_changed(sender, instance, **kwargs):
+    user_cache.invalidate(instance.user_id)
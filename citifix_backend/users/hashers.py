@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, must_update_salt
+
+MIN_ITERATIONS = 100000
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with the work factor taken from PASSWORD_HASH_ITERATIONS,
+    never below MIN_ITERATIONS.
+
+    It keeps the standard ``pbkdf2_sha256`` algorithm name, so existing
+    hashes still verify. A hash stored with fewer iterations than configured
+    is rewritten on the user's next successful login; stronger hashes are
+    kept as they are.
+    """
+
+    @property
+    def iterations(self):
+        configured = getattr(settings, 'PASSWORD_HASH_ITERATIONS', None) or PBKDF2PasswordHasher.iterations
+        return max(configured, MIN_ITERATIONS)
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return decoded['iterations'] < self.iterations or must_update_salt(decoded['salt'], self.salt_entropy)
@@ -0,0 +1,52 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+from config.caches import is_shared_cache
+from users.authentication import CachedJWTAuthentication, user_cache
+from users.models import CitizenProfile, User
+from users.serializers import UserSerializer
+
+
+class Command(BaseCommand):
+    help = 'Measure per-request cost of resolving the user (and profile) from a JWT, with and without the cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if not is_shared_cache():
+            self.stderr.write(self.style.WARNING('The default cache is per process, so the user cache is disabled'))
+
+        with transaction.atomic():
+            user = User.objects.create_user(email='auth-benchmark@example.com', password=None, user_type='citizen', status='active')
+            CitizenProfile.objects.create(user=user, first_name='Auth', last_name='Benchmark')
+            header = f'Bearer {AccessToken.for_user(user)}'
+
+            for authenticator in (JWTAuthentication(), CachedJWTAuthentication()):
+                user_cache.clear()
+                self.measure(authenticator, header, options['requests'])
+
+            self.stdout.write(f'Cache stats: {user_cache.get_stats()}')
+            transaction.set_rollback(True)
+
+    def measure(self, authenticator, header, count):
+        factory = APIRequestFactory()
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(count):
+                request = Request(factory.get('/api/v1/auth/me/', HTTP_AUTHORIZATION=header))
+                user, _ = authenticator.authenticate(request)
+                # What get_current_user renders, including the profile
+                UserSerializer(user).data
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f'{authenticator.__class__.__name__:<26} {elapsed / count * 1e6:8.1f} us/request  '
+            f'{len(queries) / count:.2f} queries/request'
+        )
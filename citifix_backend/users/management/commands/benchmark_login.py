@@ -0,0 +1,49 @@
+import time
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+from users.models import CitizenProfile, User
+from users.views import login_view
+
+PASSWORD = 'benchmark-password-123'
+
+
+class Command(BaseCommand):
+    help = 'Measure sequential logins per second (one core) through login_view'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20)
+        parser.add_argument(
+            '--iterations', type=int, nargs='*',
+            help='PBKDF2 iteration counts to compare (default: the configured one)',
+        )
+
+    def handle(self, *args, **options):
+        if options['logins'] < 1:
+            raise CommandError('--logins must be positive')
+
+        for iterations in options['iterations'] or [None]:
+            overrides = {'PASSWORD_HASH_ITERATIONS': iterations} if iterations else {}
+            with override_settings(**overrides), transaction.atomic():
+                self.measure(options['logins'])
+                transaction.set_rollback(True)
+
+    def measure(self, count):
+        user = User.objects.create_user(email='login-benchmark@example.com', password=PASSWORD, user_type='citizen', status='active')
+        CitizenProfile.objects.create(user=user, first_name='Login', last_name='Benchmark')
+        factory = APIRequestFactory()
+
+        started = time.perf_counter()
+        for _ in range(count):
+            request = factory.post('/api/v1/auth/login/', {'email': user.email, 'password': PASSWORD}, format='json')
+            response = login_view(request)
+            if response.status_code != 200:
+                raise CommandError(f'Login failed: {response.data}')
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f'{get_hasher().iterations:>9} iterations  {count / elapsed:7.1f} logins/s per core  '
+            f'{elapsed / count * 1000:7.1f} ms/login'
+        )
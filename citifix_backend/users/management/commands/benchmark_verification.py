@@ -0,0 +1,74 @@
+import time
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+from users.models import AuthorityProfile, MediaHouseProfile, User, VerificationDocument
+from users.views import bulk_verify_users, verify_user
+
+
+class Command(BaseCommand):
+    help = 'Compare verifying pending accounts one request at a time with one bulk request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('--users must be positive')
+
+        for label, run in (('single endpoint loop', self.verify_one_by_one), ('bulk endpoint', self.verify_in_bulk)):
+            with transaction.atomic():
+                admin = User.objects.create_superuser(email='verification-benchmark@example.com', password=None)
+                user_ids = self.seed(options['users'])
+
+                reset_queries()
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    run(admin, user_ids)
+                    elapsed = time.perf_counter() - started
+
+                if User.objects.filter(id__in=user_ids, status='active').count() != len(user_ids):
+                    raise CommandError(f'{label}: not every user was verified')
+                self.stdout.write(
+                    f'{label:<22} {len(user_ids)} users  {elapsed * 1000:8.1f} ms  {len(queries):6} queries'
+                )
+                transaction.set_rollback(True)
+
+    def seed(self, count):
+        user_ids = []
+        for index in range(count):
+            user_type = ('authority', 'media_house')[index % 2]
+            user = User.objects.create_user(email=f'pending-{index}@example.com', password=None, user_type=user_type, status='pending')
+            if user_type == 'authority':
+                AuthorityProfile.objects.create(
+                    user=user, organization_name=f'Authority {index}', authority_type='fire',
+                    jurisdiction_area='Accra', license_number=f'L{index}', head_officer_name='Officer',
+                )
+            else:
+                MediaHouseProfile.objects.create(
+                    user=user, company_name=f'Media {index}', registration_number=f'R{index}',
+                    media_type='online', press_license_number=f'P{index}',
+                )
+            document = VerificationDocument(user=user, document_type='license', document_name='license.pdf', file_size=16)
+            document.document_file.save('license.pdf', ContentFile(b'benchmark licence'), save=True)
+            user_ids.append(user.id)
+        return user_ids
+
+    def verify_one_by_one(self, admin, user_ids):
+        factory = APIRequestFactory()
+        for user_id in user_ids:
+            request = factory.patch(f'/api/v1/admin/users/{user_id}/verify/')
+            force_authenticate(request, user=admin)
+            response = verify_user(request, user_id=user_id)
+            if response.status_code != 200:
+                raise CommandError(f'Verification failed: {response.data}')
+
+    def verify_in_bulk(self, admin, user_ids):
+        factory = APIRequestFactory()
+        request = factory.post('/api/v1/admin/users/bulk-verify/', {'user_ids': [str(user_id) for user_id in user_ids]}, format='json')
+        force_authenticate(request, user=admin)
+        response = bulk_verify_users(request)
+        if response.status_code != 200 or response.data['data']['failed']:
+            raise CommandError(f'Bulk verification failed: {response.data}')
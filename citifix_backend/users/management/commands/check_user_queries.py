@@ -0,0 +1,96 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+from users.models import AuthorityProfile, CitizenProfile, MediaHouseProfile, User
+from users.serializers import UserSerializer
+from users.views import AllUsersView, PendingVerificationsView
+
+DEFAULT_PAGE_SIZES = (5, 20, 100)
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the admin user listings at several page sizes and fail if the '
+        'number of queries grows with the page size'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-sizes', type=int, nargs='+', default=DEFAULT_PAGE_SIZES)
+
+    def handle(self, *args, **options):
+        page_sizes = sorted(set(options['page_sizes']))
+
+        with transaction.atomic():
+            admin = self.seed(max(page_sizes))
+            counts = {}
+            for name, run in self.listings(admin):
+                counts[name] = {size: self.count_queries(run, size) for size in page_sizes}
+            transaction.set_rollback(True)
+
+        failures = []
+        for name, by_size in counts.items():
+            line = '  '.join(f'{size:>4} rows: {queries} queries' for size, queries in by_size.items())
+            if len(set(by_size.values())) > 1:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'GROWS  {name:<26} {line}'))
+            else:
+                self.stdout.write(f'ok     {name:<26} {line}')
+
+        if failures:
+            raise CommandError(f'Query count depends on page size for: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('Query counts are constant'))
+
+    def seed(self, count):
+        admin = User.objects.create_user(
+            email='query-check-admin@example.com', password=None,
+            user_type='superadmin', status='active', is_staff=True,
+        )
+        # A mix of every user type, some without a profile, all pending so both listings see them
+        for index in range(count):
+            user_type = ('citizen', 'authority', 'media_house', 'citizen')[index % 4]
+            user = User.objects.create_user(
+                email=f'query-check-{index}@example.com', password=None,
+                user_type=user_type, status='pending',
+            )
+            if index % 7 == 0:
+                continue
+            if user_type == 'citizen':
+                CitizenProfile.objects.create(user=user, first_name='Query', last_name=str(index))
+            elif user_type == 'authority':
+                AuthorityProfile.objects.create(
+                    user=user, organization_name=f'Org {index}', authority_type='police',
+                    jurisdiction_area='Accra', license_number=str(index), head_officer_name='Officer',
+                )
+            else:
+                MediaHouseProfile.objects.create(
+                    user=user, company_name=f'Media {index}', registration_number=str(index),
+                    media_type='tv', press_license_number=str(index),
+                )
+        return admin
+
+    def listings(self, admin):
+        factory = APIRequestFactory()
+
+        def view(view_class):
+            def run(size):
+                request = factory.get('/', {'pagination': 'cursor', 'page_size': size, 'status': 'pending'})
+                force_authenticate(request, user=admin)
+                response = view_class.as_view(pagination_class=AllUsersView.pagination_class)(request)
+                response.render()
+                return json.loads(response.content)
+            return run
+
+        def serializer(size):
+            # Plain list of users, as any other caller might pass
+            return UserSerializer(list(User.objects.filter(status='pending')[:size]), many=True).data
+
+        yield 'AllUsersView', view(AllUsersView)
+        yield 'PendingVerificationsView', view(PendingVerificationsView)
+        yield 'UserSerializer(many)', serializer
+
+    def count_queries(self, run, size):
+        with CaptureQueriesContext(connection) as queries:
+            run(size)
+        return len(queries)
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from users.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Recompute the normalized search columns of every user and rebuild the search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        rebuild_search_index(using=options['database'])
+        self.stdout.write(self.style.SUCCESS('User search index rebuilt'))
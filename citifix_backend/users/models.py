@@ -1,8 +1,8 @@
 import uuid
-import os
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.core.validators import RegexValidator
+from files.storage import content_addressed_storage
 
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -53,14 +53,39 @@ class User(AbstractBaseUser, PermissionsMixin):
     updated_at = models.DateTimeField(auto_now=True)
     last_login_at = models.DateTimeField(null=True, blank=True)
 
+    # Normalized copies for indexed search, see users.search
+    email_lower = models.CharField(max_length=254, default='', editable=False)
+    phone_digits = models.CharField(max_length=17, blank=True, default='', editable=False)
+    search_name = models.CharField(max_length=255, blank=True, default='', editable=False)
+
     objects = UserManager()
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='user_created_id_idx'),
+            models.Index(fields=['email_lower'], name='user_email_lower_idx'),
+            models.Index(fields=['phone_digits'], name='user_phone_digits_idx'),
+            models.Index(fields=['search_name'], name='user_search_name_idx'),
+        ]
+
     def __str__(self):
         return f"{self.email} ({self.user_type})"
 
+    def update_search_fields(self):
+        from .search import normalize, phone_digits
+        self.email_lower = normalize(self.email)
+        self.phone_digits = phone_digits(self.phone)
+
+    def save(self, *args, **kwargs):
+        self.update_search_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'email', 'phone'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'email_lower', 'phone_digits'}
+        super().save(*args, **kwargs)
+
 class CitizenProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='citizen_profile')
     first_name = models.CharField(max_length=100)
@@ -86,7 +111,7 @@ class AuthorityProfile(models.Model):
     organization_name = models.CharField(max_length=200)
     authority_type = models.CharField(max_length=50, choices=AUTHORITY_TYPES)
     jurisdiction_area = models.TextField()
-    license_number = models.CharField(max_length=100)
+    license_number = models.CharField(max_length=100, db_index=True)
     head_officer_name = models.CharField(max_length=200)
     
     verified_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='verified_authorities')
@@ -107,7 +132,7 @@ class MediaHouseProfile(models.Model):
 
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='media_profile')
     company_name = models.CharField(max_length=200)
-    registration_number = models.CharField(max_length=100)
+    registration_number = models.CharField(max_length=100, db_index=True)
     media_type = models.CharField(max_length=50, choices=MEDIA_TYPES)
     press_license_number = models.CharField(max_length=100)
     
@@ -135,16 +160,10 @@ class VerificationDocument(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='verification_documents')
     document_type = models.CharField(max_length=50, choices=DOCUMENT_TYPES)
-    document_file = models.FileField(upload_to=verification_document_upload_path)
+    document_file = models.FileField(upload_to=verification_document_upload_path, storage=content_addressed_storage)
     document_name = models.CharField(max_length=255)
     file_size = models.IntegerField()
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.document_type} - {self.user.email}"
-
-    def delete(self, *args, **kwargs):
-        if self.document_file:
-            if os.path.isfile(self.document_file.path):
-                os.remove(self.document_file.path)
-        super().delete(*args, **kwargs)
\ No newline at end of file
+        return f"{self.document_type} - {self.user.email}"
\ No newline at end of file
@@ -0,0 +1,248 @@
+import logging
+import re
+import unicodedata
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import DatabaseError, connections, router, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from .models import AuthorityProfile, CitizenProfile, MediaHouseProfile, User
+from .serializers import PROFILE_RELATIONS
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'users_user_fts'
+PG_INDEX = 'users_user_search_trgm_idx'
+USER_TABLE = User._meta.db_table
+PG_DOCUMENT = f"({USER_TABLE}.email_lower || ' ' || {USER_TABLE}.search_name || ' ' || {USER_TABLE}.phone_digits)"
+REINDEX_CHUNK_SIZE = 2000
+
+# Trigram indexes can't answer anything shorter
+MIN_SUBSTRING_LENGTH = 3
+PHONE_RE = re.compile(r'^\+?[\d\s().-]+$')
+
+
+def _vendor(using=None):
+    return connections[using or router.db_for_write(User)].vendor
+
+
+def _doc_id(user_id):
+    return user_id.int & ((1 << 63) - 1)
+
+
+def normalize(text):
+    """Case folded, accent free, single spaced text, as stored in the search columns."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.casefold().split())
+
+
+def phone_digits(phone):
+    return re.sub(r'\D', '', phone or '')
+
+
+def profile_name(profile):
+    if isinstance(profile, CitizenProfile):
+        return f'{profile.first_name} {profile.last_name}'
+    if isinstance(profile, AuthorityProfile):
+        return profile.organization_name
+    if isinstance(profile, MediaHouseProfile):
+        return profile.company_name
+    return ''
+
+
+def user_profile_name(user):
+    relation = PROFILE_RELATIONS.get(user.user_type)
+    if relation is None:
+        return ''
+    try:
+        return profile_name(getattr(user, relation))
+    except ObjectDoesNotExist:
+        return ''
+
+
+def prefix_q(field, prefix):
+    # A range instead of LIKE 'prefix%' so the plain b-tree index is used on
+    # every backend; U+10FFFF sorts after every other character.
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + '\U0010ffff'})
+
+
+def create_search_index(using='default', **kwargs):
+    """post_migrate hook: create the substring index for the current backend."""
+    connection = connections[using]
+
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            tables = connection.introspection.table_names(cursor)
+            if FTS_TABLE in tables:
+                return
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                f"email, phone, name, user_id UNINDEXED, tokenize='trigram')"
+            )
+        rebuild_search_index(using=using)
+    elif connection.vendor == 'postgresql':
+        try:
+            with transaction.atomic(using=using), connection.cursor() as cursor:
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {PG_INDEX} ON {USER_TABLE} USING gin ({PG_DOCUMENT} gin_trgm_ops)'
+                )
+        except DatabaseError:
+            # Creating the extension needs extra privileges, prefix search still works without it
+            logger.warning('pg_trgm is not available, user search falls back to prefix matching')
+
+
+def index_users(users, using=None):
+    using = using or router.db_for_write(User)
+    if _vendor(using) != 'sqlite':
+        return
+
+    rows = [(_doc_id(user.id), user.email_lower, user.phone_digits, user.search_name, user.id.hex) for user in users]
+    if not rows:
+        return
+
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f"INSERT OR REPLACE INTO {FTS_TABLE}(rowid, email, phone, name, user_id) VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def remove_users(user_ids, using=None):
+    using = using or router.db_for_write(User)
+    if _vendor(using) != 'sqlite':
+        return
+
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+            [(_doc_id(user_id),) for user_id in user_ids],
+        )
+
+
+def rebuild_search_index(using=None):
+    """Recompute the normalized columns of every user and reindex them."""
+    using = using or router.db_for_write(User)
+
+    if _vendor(using) == 'sqlite':
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    users = User.objects.using(using).select_related(*PROFILE_RELATIONS.values()).only(
+        'id', 'email', 'phone', 'user_type', 'email_lower', 'phone_digits', 'search_name',
+        'citizen_profile__first_name', 'citizen_profile__last_name',
+        'authority_profile__organization_name', 'media_profile__company_name',
+    ).order_by('pk').iterator(chunk_size=REINDEX_CHUNK_SIZE)
+
+    batch, changed = [], []
+    for user in users:
+        current = (user.email_lower, user.phone_digits, user.search_name)
+        user.update_search_fields()
+        user.search_name = normalize(user_profile_name(user))
+        if current != (user.email_lower, user.phone_digits, user.search_name):
+            changed.append(user)
+        batch.append(user)
+        if len(batch) >= REINDEX_CHUNK_SIZE:
+            _store_batch(batch, changed, using)
+            batch, changed = [], []
+    _store_batch(batch, changed, using)
+
+
+def _store_batch(users, changed, using):
+    # Plain executemany, bulk_update's CASE expressions are far slower here
+    connection = connections[using]
+    pk_field = User._meta.pk
+    rows = [
+        (user.email_lower, user.phone_digits, user.search_name, pk_field.get_db_prep_value(user.id, connection))
+        for user in changed
+    ]
+    if rows:
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"UPDATE {USER_TABLE} SET email_lower = %s, phone_digits = %s, search_name = %s WHERE id = %s",
+                rows,
+            )
+    index_users(users, using=using)
+
+
+def user_saved(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not {'email_lower', 'phone_digits', 'search_name'} & set(update_fields):
+        return
+    index_users([instance], using=using)
+
+
+def user_deleted(sender, instance, using=None, **kwargs):
+    remove_users([instance.id], using=using)
+
+
+def profile_saved(sender, instance, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    name = normalize(profile_name(instance))
+    User.objects.using(using).filter(pk=instance.user_id).update(search_name=name)
+    user = User.objects.using(using).only('id', 'email_lower', 'phone_digits', 'search_name').get(pk=instance.user_id)
+    index_users([user], using=using)
+
+
+def _substring_q(text, digits, lookup, using):
+    vendor = _vendor(using)
+    # Without the trunk 0 a local number also matches the stored international one
+    digits = digits.lstrip('0')
+    if len(text) < MIN_SUBSTRING_LENGTH and len(digits) < MIN_SUBSTRING_LENGTH:
+        return Q()
+
+    if vendor == 'sqlite':
+        # Each query is a quoted phrase so user input can't inject FTS5 syntax
+        clauses = []
+        if len(text) >= MIN_SUBSTRING_LENGTH:
+            clauses.append('{email name} : "%s"' % text.replace('"', '""'))
+        if len(digits) >= MIN_SUBSTRING_LENGTH:
+            clauses.append('phone : "%s"' % digits)
+        subquery = RawSQL(f'SELECT user_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [' OR '.join(clauses)])
+        return Q(**{f'{lookup}id__in': subquery})
+
+    if vendor == 'postgresql':
+        patterns = ['%' + re.sub(r'([\\%_])', r'\\\1', value) + '%' for value in (text, digits) if len(value) >= MIN_SUBSTRING_LENGTH]
+        where = ' OR '.join(f'{PG_DOCUMENT} LIKE %s' for _ in patterns)
+        subquery = RawSQL(f'SELECT id FROM {USER_TABLE} WHERE {where}', patterns)
+        return Q(**{f'{lookup}id__in': subquery})
+
+    query = Q(**{f'{lookup}email_lower__contains': text}) | Q(**{f'{lookup}search_name__contains': text})
+    if digits:
+        query |= Q(**{f'{lookup}phone_digits__contains': digits})
+    return query
+
+
+def search_users(queryset, term, lookup='', exact=None):
+    """
+    Filter ``queryset`` to users whose email, phone or profile name matches
+    ``term``. Exact matches come first, then prefix matches, then matches
+    anywhere in the text.
+
+    ``lookup`` is the path to the user from the queryset's model (for
+    example ``'user__'`` for profiles) and ``exact`` an extra condition that
+    counts as an exact match.
+    """
+    text = normalize(term)
+    if not text:
+        return queryset
+    digits = phone_digits(term) if PHONE_RE.match(term.strip()) else ''
+
+    exact_q = Q(**{f'{lookup}email_lower': text}) | Q(**{f'{lookup}search_name': text})
+    prefix = prefix_q(f'{lookup}email_lower', text) | prefix_q(f'{lookup}search_name', text)
+    if digits:
+        exact_q |= Q(**{f'{lookup}phone_digits': digits})
+        prefix |= prefix_q(f'{lookup}phone_digits', digits)
+    if exact is not None:
+        exact_q |= exact
+
+    return queryset.filter(exact_q | prefix | _substring_q(text, digits, lookup, queryset.db)).annotate(
+        search_rank=Case(
+            When(exact_q, then=Value(0)),
+            When(prefix, then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField(),
+        )
+    ).order_by('search_rank', f'{lookup}email_lower')
@@ -1,5 +1,9 @@
+from collections import defaultdict
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from django.db import models
+from django.db.models import prefetch_related_objects
+from files.access import protected_url
 from .models import User, CitizenProfile, AuthorityProfile, MediaHouseProfile, VerificationDocument
 
 class CitizenProfileSerializer(serializers.ModelSerializer):
@@ -28,9 +32,38 @@ class VerificationDocumentSerializer(serializers.ModelSerializer):
         if obj.document_file:
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(obj.document_file.url)
+                return protected_url(request, 'document_file', 'document', obj.id)
         return None
 
+# Profile relation used by each user type
+PROFILE_RELATIONS = {
+    'citizen': 'citizen_profile',
+    'authority': 'authority_profile',
+    'media_house': 'media_profile',
+}
+
+def prefetch_profiles(users):
+    """
+    Load the profile of every user in one query per user type, skipping
+    users whose profile is already loaded (select_related or cached). Use it
+    for lists whose queryset you do not control; for querysets
+    ``select_related(*PROFILE_RELATIONS.values())`` does it in the same query.
+    """
+    by_relation = defaultdict(list)
+    for user in users:
+        relation = PROFILE_RELATIONS.get(user.user_type)
+        if relation and not getattr(User, relation).is_cached(user):
+            by_relation[relation].append(user)
+    
+    for relation, group in by_relation.items():
+        prefetch_related_objects(group, relation)
+    return users
+
+class UserListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        users = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        return super().to_representation(prefetch_profiles(users))
+
 class UserSerializer(serializers.ModelSerializer):
     profile = serializers.SerializerMethodField()
 
@@ -38,6 +71,7 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'email', 'phone', 'user_type', 'status', 'email_verified', 'profile', 'created_at']
         read_only_fields = ['id', 'created_at']
+        list_serializer_class = UserListSerializer
 
     def get_profile(self, obj):
         if obj.user_type == 'citizen' and hasattr(obj, 'citizen_profile'):
@@ -165,4 +199,9 @@ class LoginSerializer(serializers.Serializer):
             raise serializers.ValidationError("Your account registration was rejected")
         
         data['user'] = user
-        return data
\ No newline at end of file
+        return data
+
+
+class BulkVerificationSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False, max_length=500)
+    reason = serializers.CharField(required=False, default='Not specified')
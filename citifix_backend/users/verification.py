@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.utils import timezone
+from notifications.dispatch import dispatcher
+from .authentication import user_cache
+from .models import AuthorityProfile, MediaHouseProfile, User, VerificationDocument
+
+# User types that need at least one verification document before approval
+DOCUMENT_REQUIRED_TYPES = ('authority', 'media_house')
+
+OUTCOME_ERRORS = {
+    'not_found': 'User not found',
+    'not_pending': 'User is not pending verification',
+    'documents_required': 'User must upload verification documents first',
+}
+
+
+def _outcomes(user_ids, accepted, rejected):
+    results = []
+    for user_id in user_ids:
+        if user_id in accepted:
+            results.append({'id': str(user_id), 'success': True})
+        else:
+            outcome = rejected[user_id]
+            results.append({'id': str(user_id), 'success': False, 'outcome': outcome, 'error': OUTCOME_ERRORS[outcome]})
+    return results
+
+
+def _lock_pending(user_ids):
+    """Lock the requested users and split them into {id: user_type} of pending ones and {id: outcome} of the rest."""
+    rows = User.objects.select_for_update().filter(id__in=user_ids).values_list('id', 'status', 'user_type')
+    pending, refused = {}, {}
+    for user_id, user_status, user_type in rows:
+        if user_status == 'pending':
+            pending[user_id] = user_type
+        else:
+            refused[user_id] = 'not_pending'
+    for user_id in user_ids:
+        if user_id not in pending and user_id not in refused:
+            refused[user_id] = 'not_found'
+    return pending, refused
+
+
+def _finish(user_ids, new_status, now):
+    User.objects.filter(id__in=user_ids).update(status=new_status, updated_at=now)
+    # .update() sends no post_save, so evict the cached users explicitly
+    transaction.on_commit(lambda: [user_cache.invalidate(user_id) for user_id in user_ids])
+    membership_changed(user_ids)
+
+
+def membership_changed(user_ids):
+    """Have the users' open dashboards join or leave their role group once the status change commits."""
+    from notifications.services import NotificationService
+    dispatcher.dispatch_on_commit(NotificationService.send_membership_update, list(user_ids))
+
+
+def verify_users(user_ids, verified_by):
+    """
+    Activate every pending user in ``user_ids`` in one transaction and
+    return one result per id, in the order given. Authorities and media
+    houses without documents are left pending.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    now = timezone.now()
+
+    with transaction.atomic():
+        pending, refused = _lock_pending(user_ids)
+
+        needs_documents = [user_id for user_id, user_type in pending.items() if user_type in DOCUMENT_REQUIRED_TYPES]
+        # One query for all of them instead of a count per user
+        with_documents = set(
+            VerificationDocument.objects.filter(user_id__in=needs_documents).values_list('user_id', flat=True).distinct()
+        )
+        for user_id in needs_documents:
+            if user_id not in with_documents:
+                del pending[user_id]
+                refused[user_id] = 'documents_required'
+
+        verified = list(pending)
+        if verified:
+            _finish(verified, 'active', now)
+            for profile_model in (AuthorityProfile, MediaHouseProfile):
+                profile_model.objects.filter(user_id__in=verified).update(verified_by=verified_by, verified_at=now)
+
+    return _outcomes(user_ids, set(verified), refused)
+
+
+def reject_users(user_ids, reason):
+    """Reject every pending user in ``user_ids`` in one transaction, see verify_users."""
+    user_ids = list(dict.fromkeys(user_ids))
+    now = timezone.now()
+
+    with transaction.atomic():
+        pending, refused = _lock_pending(user_ids)
+        rejected = list(pending)
+        if rejected:
+            _finish(rejected, 'rejected', now)
+            for profile_model in (AuthorityProfile, MediaHouseProfile):
+                profile_model.objects.filter(user_id__in=rejected).update(rejection_reason=reason)
+
+    return _outcomes(user_ids, set(rejected), refused)
@@ -4,9 +4,17 @@ from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.utils import timezone
-from django.db.models import Q
 from .models import User, CitizenProfile, AuthorityProfile, MediaHouseProfile, VerificationDocument
 from .serializers import *
+from config.pagination import OptionalKeysetPagination
+from notifications.dispatch import dispatcher
+from notifications.events import event_log
+from reports.derivatives import generator
+from reports.response_cache import response_cache
+from .activity import last_login_recorder
+from .authentication import user_cache
+from .search import search_users
+from .verification import membership_changed, reject_users, verify_users
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -76,7 +84,7 @@ def login_view(request):
     if serializer.is_valid():
         user = serializer.validated_data['user']
         user.last_login_at = timezone.now()
-        user.save()
+        last_login_recorder.record(user.pk, user.last_login_at)
         
         refresh = RefreshToken.for_user(user)
         
@@ -202,7 +210,7 @@ class PendingVerificationsView(generics.ListAPIView):
     
     def get_queryset(self):
         return User.objects.filter(status='pending').select_related(
-            'authority_profile', 'media_profile'
+            *PROFILE_RELATIONS.values()
         ).prefetch_related('verification_documents')
 
 @api_view(['PATCH'])
@@ -221,6 +229,7 @@ def verify_user(request, user_id):
         
         user.status = 'active'
         user.save()
+        membership_changed([user.id])
         
         if hasattr(user, 'authority_profile'):
             profile = user.authority_profile
@@ -256,6 +265,7 @@ def reject_user(request, user_id):
         
         user.status = 'rejected'
         user.save()
+        membership_changed([user.id])
         
         if hasattr(user, 'authority_profile'):
             profile = user.authority_profile
@@ -278,12 +288,51 @@ def reject_user(request, user_id):
             'error': 'User not found'
         }, status=status.HTTP_404_NOT_FOUND)
 
+def _bulk_verification_response(results, message):
+    succeeded = sum(1 for result in results if result['success'])
+    return Response({
+        'success': True,
+        'data': {
+            'results': results,
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+        },
+        'message': message.format(succeeded)
+    })
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def bulk_verify_users(request):
+    serializer = BulkVerificationSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'error': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    results = verify_users(serializer.validated_data['user_ids'], request.user)
+    return _bulk_verification_response(results, '{} user(s) verified')
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def bulk_reject_users(request):
+    serializer = BulkVerificationSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'error': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    results = reject_users(serializer.validated_data['user_ids'], serializer.validated_data['reason'])
+    return _bulk_verification_response(results, '{} user(s) rejected')
+
 class AllUsersView(generics.ListAPIView):
     permission_classes = [IsAuthenticated, IsAdminUser]
     serializer_class = UserSerializer
+    pagination_class = OptionalKeysetPagination
     
     def get_queryset(self):
-        queryset = User.objects.all()
+        queryset = User.objects.select_related(*PROFILE_RELATIONS.values())
         
         user_type = self.request.query_params.get('user_type')
         status_filter = self.request.query_params.get('status')
@@ -294,9 +343,20 @@ class AllUsersView(generics.ListAPIView):
         if status_filter:
             queryset = queryset.filter(status=status_filter)
         if search:
-            queryset = queryset.filter(
-                Q(email__icontains=search) | 
-                Q(phone__icontains=search)
-            )
+            queryset = search_users(queryset, search)
         
-        return queryset
\ No newline at end of file
+        return queryset
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def metrics(request):
+    return Response({
+        'success': True,
+        'data': {
+            'auth_user_cache': user_cache.get_stats(),
+            'notification_dispatch': dispatcher.get_stats(),
+            'notification_event_log': event_log.get_stats(),
+            'media_derivatives': generator.get_stats(),
+            'report_response_cache': response_cache.get_stats(),
+        }
+    })
@@ -51,10 +51,10 @@ const ReportCard = ({ report, showActions = false, onStatusChange }) => {
         )}
       </div>
 
-      {report.media_attachments && report.media_attachments.length > 0 && (
+      {report.media_attachment_count > 0 && (
         <div className="mb-4">
           <p className="text-sm text-gray-500">
-            📎 {report.media_attachments.length} attachment(s)
+            📎 {report.media_attachment_count} attachment(s)
           </p>
         </div>
       )}
@@ -8,43 +8,66 @@ export const useWebSocket = () => {
     reports: [],
     stats: null
   });
+  const [resyncRequired, setResyncRequired] = useState(false);
   const ws = useRef(null);
+  // Last sequence number seen per stream, sent back on reconnect to replay missed events
+  const lastSeq = useRef({});
   
   useEffect(() => {
     if (!user) return;
     
-    const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-    const wsUrl = `${protocol}//${window.location.host}/ws/dashboard/`;
+    let reconnectTimer = null;
+    let attempts = 0;
+    let closed = false;
     
-    try {
-      ws.current = new WebSocket(wsUrl);
+    const connect = () => {
+      const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+      const resume = Object.entries(lastSeq.current).map(([stream, seq]) => `${stream}:${seq}`).join(',');
+      const wsUrl = `${protocol}//${window.location.host}/ws/dashboard/${resume ? `?resume=${encodeURIComponent(resume)}` : ''}`;
       
-      ws.current.onopen = () => {
-        console.log('WebSocket connected successfully');
-      };
-      
-      ws.current.onmessage = (event) => {
-        try {
-          const data = JSON.parse(event.data);
-          handleWebSocketMessage(data);
-        } catch (error) {
-          console.error('Error parsing WebSocket message:', error);
-        }
-      };
-      
-      ws.current.onclose = () => {
-        console.log('WebSocket disconnected');
-      };
-      
-      ws.current.onerror = (error) => {
-        console.error('WebSocket error:', error);
-      };
-      
-    } catch (error) {
-      console.error('Failed to create WebSocket connection:', error);
-    }
+      try {
+        ws.current = new WebSocket(wsUrl);
+        
+        ws.current.onopen = () => {
+          attempts = 0;
+          console.log('WebSocket connected successfully');
+        };
+        
+        ws.current.onmessage = (event) => {
+          try {
+            const data = JSON.parse(event.data);
+            if (data.seq !== undefined) {
+              lastSeq.current[data.stream] = Math.max(lastSeq.current[data.stream] || 0, data.seq);
+            }
+            handleWebSocketMessage(data);
+          } catch (error) {
+            console.error('Error parsing WebSocket message:', error);
+          }
+        };
+        
+        ws.current.onclose = () => {
+          console.log('WebSocket disconnected');
+          if (closed) return;
+          // Back off up to 30s between attempts
+          const delay = Math.min(1000 * 2 ** attempts, 30000);
+          attempts += 1;
+          reconnectTimer = setTimeout(connect, delay);
+        };
+        
+        ws.current.onerror = (error) => {
+          console.error('WebSocket error:', error);
+        };
+        
+      } catch (error) {
+        console.error('Failed to create WebSocket connection:', error);
+      }
+    };
+    
+    connect();
     
     return () => {
+      closed = true;
+      clearTimeout(reconnectTimer);
       if (ws.current) {
         ws.current.close();
       }
@@ -65,6 +88,18 @@ export const useWebSocket = () => {
         }]);
         break;
         
+      case 'new_reports':
+        setRealtimeData(prev => ({
+          ...prev,
+          reports: [...data.data.reports, ...prev.reports]
+        }));
+        setNotifications(prev => [...prev, {
+          type: 'info',
+          message: data.data.message,
+          timestamp: new Date().toISOString()
+        }]);
+        break;
+        
       case 'report_update':
         setRealtimeData(prev => ({
           ...prev,
@@ -85,6 +120,21 @@ export const useWebSocket = () => {
         setNotifications(prev => [...prev, data.data]);
         break;
         
+      case 'streams':
+        // Starting points for streams we have not seen events on yet
+        Object.entries(data.streams).forEach(([stream, seq]) => {
+          if (lastSeq.current[stream] === undefined) {
+            lastSeq.current[stream] = seq;
+          }
+        });
+        break;
+        
+      case 'resync_required':
+        // Missed events are no longer buffered, reload instead
+        delete lastSeq.current[data.stream];
+        setResyncRequired(true);
+        break;
+        
       default:
         console.log('Unknown message type:', data.type);
     }
@@ -98,6 +148,8 @@ export const useWebSocket = () => {
     notifications,
     realtimeData,
     clearNotification,
+    resyncRequired,
+    clearResync: () => setResyncRequired(false),
     isConnected: ws.current?.readyState === WebSocket.OPEN
   };
 };
\ No newline at end of file
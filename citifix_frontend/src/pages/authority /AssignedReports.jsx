@@ -15,6 +15,8 @@ const AssignedReports = () => {
   });
   const [selectedReport, setSelectedReport] = useState(null);
   const [note, setNote] = useState('');
+  // Full activity is only fetched, a page at a time, for the reports it is opened on
+  const [activity, setActivity] = useState({});
 
   useEffect(() => {
     fetchAssignedReports();
@@ -63,6 +65,33 @@ const AssignedReports = () => {
     }
   };
 
+  const loadActivity = async (reportId, cursor) => {
+    try {
+      const response = await reportAPI.getTimeline(reportId, { page_size: 10, ...(cursor && { cursor }) });
+      const next = response.data.next ? new URL(response.data.next).searchParams.get('cursor') : null;
+      setActivity(prev => ({
+        ...prev,
+        [reportId]: {
+          entries: [...(cursor ? prev[reportId]?.entries || [] : []), ...response.data.results],
+          next
+        }
+      }));
+    } catch (error) {
+      console.error('Failed to fetch activity:', error);
+    }
+  };
+
+  const toggleActivity = (reportId) => {
+    if (activity[reportId]) {
+      setActivity(prev => {
+        const { [reportId]: _, ...rest } = prev;
+        return rest;
+      });
+    } else {
+      loadActivity(reportId);
+    }
+  };
+
   const handleFilterChange = (key, value) => {
     setFilters(prev => ({
       ...prev,
@@ -279,17 +308,35 @@ const AssignedReports = () => {
                 )}
 
                 {/* Action Logs */}
-                {report.action_logs && report.action_logs.length > 0 && (
+                {report.latest_action && (
                   <div className="mt-4">
                     <h4 className="text-sm font-medium text-gray-700 mb-2">Recent Activity</h4>
                     <div className="space-y-2 max-h-32 overflow-y-auto">
-                      {report.action_logs.slice(0, 3).map((log) => (
+                      {(activity[report.id]?.entries || [report.latest_action]).map((log) => (
                         <div key={log.id} className="text-xs text-gray-600 border-l-2 border-blue-500 pl-2">
                           <span className="font-medium">{log.actor_email}:</span> {log.description}
                           <div className="text-gray-400">{new Date(log.timestamp).toLocaleString()}</div>
                         </div>
                       ))}
                     </div>
+                    <div className="flex gap-3 mt-2">
+                      {report.action_log_count > 1 && (
+                        <button
+                          onClick={() => toggleActivity(report.id)}
+                          className="text-xs text-blue-600 hover:underline"
+                        >
+                          {activity[report.id] ? 'Show latest only' : `Show all activity (${report.action_log_count})`}
+                        </button>
+                      )}
+                      {activity[report.id]?.next && (
+                        <button
+                          onClick={() => loadActivity(report.id, activity[report.id].next)}
+                          className="text-xs text-blue-600 hover:underline"
+                        >
+                          Load more
+                        </button>
+                      )}
+                    </div>
                   </div>
                 )}
               </div>
@@ -42,12 +42,19 @@ export const reportAPI = {
   getReports: (params) => api.get('/reports/', { params }),
   getReport: (id) => api.get(`/reports/${id}/`),
   createReport: (data) => api.post('/reports/', data),
+  createReportsBulk: (reports) => api.post('/reports/bulk/', { reports }),
   updateReport: (id, data) => api.patch(`/reports/${id}/`, data),
   getMyReports: (params) => api.get('/reports/my_reports/', { params }),
   getAssignedReports: (params) => api.get('/reports/assigned_to_me/', { params }),
   updateStatus: (id, status) => api.patch(`/reports/${id}/update_status/`, { status }),
   assignReport: (id, authorityId) => api.patch(`/reports/${id}/assign/`, { authority_id: authorityId }),
   addNote: (id, note) => api.post(`/reports/${id}/add_note/`, { note }),
+  getTimeline: (id, params) => api.get(`/reports/${id}/timeline/`, { params }),
+  startUpload: (id, data) => api.post(`/reports/${id}/uploads/`, data),
+  getUpload: (uploadId) => api.get(`/reports/uploads/${uploadId}/`),
+  uploadChunk: (uploadId, offset, chunk) => api.patch(`/reports/uploads/${uploadId}/`, chunk, {
+    headers: { 'Content-Type': 'application/offset+octet-stream', 'Upload-Offset': String(offset) },
+  }),
 };
 
 export const documentAPI = {
@@ -63,6 +70,8 @@ export const adminAPI = {
   getAllUsers: (params) => api.get('/admin/users/', { params }),
   verifyUser: (userId) => api.patch(`/admin/users/${userId}/verify/`),
   rejectUser: (userId, reason) => api.patch(`/admin/users/${userId}/reject/`, { reason }),
+  bulkVerifyUsers: (userIds) => api.post('/admin/users/bulk-verify/', { user_ids: userIds }),
+  bulkRejectUsers: (userIds, reason) => api.post('/admin/users/bulk-reject/', { user_ids: userIds, reason }),
   suspendUser: (userId) => api.delete(`/admin/users/${userId}/suspend/`),
 };
 